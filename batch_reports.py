@@ -0,0 +1,174 @@
+"""
+批量导出企业PDF报告（无需Streamlit）
+
+对指定行业或整个面板中的每家企业各生成一份报告，复用 report_pdf.generate_pdf 的版式。
+任务分发到进程池，每个工作进程只加载一次数据（内存映射列式缓存）并只注册一次字体。
+报告文件名为“股票代码_企业名称.pdf”；输出目录中已存在的报告会被跳过，因此中断后重新执行同一命令即可续跑。
+
+用法：
+    python batch_reports.py --out reports/2023 [--industry 制造业 --industry 金融业]
+                            [--years 1999 2023] [--workers 8] [--zip reports_2023.zip]
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from filter_cache import compute_rows
+from panel_index import PanelIndex
+from panel_store import DEFAULT_CACHE_DIR, DEFAULT_SOURCE, load_panel, read_panel
+from report_fonts import get_report_font
+from report_pdf import generate_pdf
+
+logger = logging.getLogger(__name__)
+
+# 工作进程内共享的数据
+_worker = {}
+
+
+def _safe_filename(name):
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', str(name)).strip('_') or 'unnamed'
+
+
+def report_path(out_dir, company, code):
+    # 名称中的特殊字符会被替换，加上股票代码避免不同企业得到同一个文件名
+    return os.path.join(out_dir, f"{_safe_filename(code)}_{_safe_filename(company)}.pdf")
+
+
+def _load(source, cache_dir):
+    # 源Excel不在本机时直接读取已构建的缓存
+    if os.path.exists(source):
+        return load_panel(source, cache_dir)
+    return read_panel(cache_dir)
+
+
+def _init_worker(source, cache_dir, year_range, industries):
+    logging.basicConfig(level=logging.WARNING)
+    panel_index = PanelIndex(_load(source, cache_dir))
+    rows = compute_rows(panel_index, year_range, industries)
+    _worker['panel_index'] = panel_index
+    _worker['filtered_df'] = panel_index.frame.take(rows)
+    _worker['year_range'] = year_range
+    _worker['industries'] = industries
+    get_report_font()
+
+
+def _render(company, code, out_dir):
+    panel_index = _worker['panel_index']
+    year_range = _worker['year_range']
+    industries = _worker['industries']
+    company_data = panel_index.company(company, year_range, industries)
+    pdf_data = generate_pdf(_worker['filtered_df'], company, year_range, industries, company_data,
+                            data_version=panel_index.frame.attrs.get('dataset_version'))
+    if not pdf_data:
+        return company, False
+
+    # 先写临时文件再改名，中断时不会留下残缺的报告
+    path = report_path(out_dir, company, code)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(pdf_data)
+    os.replace(tmp_path, path)
+    return company, True
+
+
+def select_companies(panel_index, year_range, industries):
+    """筛选条件下有数据的（企业名称, 股票代码）列表，按名称排序"""
+    rows = compute_rows(panel_index, year_range, industries)
+    firms = panel_index.frame[['企业名称', '股票代码']].take(rows).drop_duplicates('企业名称')
+    return sorted(zip(firms['企业名称'].astype(str), firms['股票代码'].astype(str)))
+
+
+def find_collisions(out_dir, companies):
+    """返回输出文件名相同的企业组"""
+    by_path = {}
+    for company, code in companies:
+        by_path.setdefault(report_path(out_dir, company, code), []).append(company)
+    return [names for names in by_path.values() if len(names) > 1]
+
+
+def write_zip(out_dir, zip_path):
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name in sorted(os.listdir(out_dir)):
+            if name.endswith('.pdf'):
+                archive.write(os.path.join(out_dir, name), arcname=name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量导出企业PDF报告")
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help="源Excel文件路径")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="列式缓存目录")
+    parser.add_argument('--out', required=True, help="报告输出目录")
+    parser.add_argument('--industry', action='append', default=[], help="只导出该行业的企业，可重复指定")
+    parser.add_argument('--years', nargs=2, type=int, metavar=('START', 'END'), help="年份范围，默认全部年份")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="工作进程数")
+    parser.add_argument('--limit', type=int, help="最多导出的企业数（用于试跑）")
+    parser.add_argument('--zip', help="完成后打包为该zip文件")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    panel_index = PanelIndex(_load(args.source, args.cache_dir))
+    years = panel_index.frame['年份']
+    year_range = tuple(args.years) if args.years else (int(years.min()), int(years.max()))
+    industries = sorted(args.industry)
+
+    companies = select_companies(panel_index, year_range, industries)
+    if args.limit:
+        companies = companies[:args.limit]
+
+    collisions = find_collisions(args.out, companies)
+    if collisions:
+        for names in collisions:
+            logger.error("以下企业的报告文件名相同，会互相覆盖: %s", ", ".join(names))
+        return 2
+
+    os.makedirs(args.out, exist_ok=True)
+    pending = [(company, code) for company, code in companies
+               if not os.path.exists(report_path(args.out, company, code))]
+    logger.info("共 %d 家企业，已完成 %d 家，待生成 %d 家", len(companies), len(companies) - len(pending), len(pending))
+    del panel_index
+
+    failed = []
+    done = 0
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(
+        max_workers=max(1, args.workers),
+        initializer=_init_worker,
+        initargs=(args.source, args.cache_dir, year_range, industries),
+    )
+    try:
+        futures = [executor.submit(_render, company, code, args.out) for company, code in pending]
+        for future in as_completed(futures):
+            company, ok = future.result()
+            done += 1
+            if not ok:
+                failed.append(company)
+            if done % 50 == 0 or done == len(pending):
+                elapsed = time.perf_counter() - start
+                logger.info("进度 %d/%d，%.2f 份/秒", done, len(pending), done / elapsed if elapsed else 0.0)
+    except KeyboardInterrupt:
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("已中断，完成 %d 份；重新执行同一命令即可从断点继续", done)
+        return 130
+    executor.shutdown()
+
+    elapsed = time.perf_counter() - start
+    logger.info("完成 %d 份报告，耗时 %.1fs，吞吐 %.2f 份/秒", done - len(failed), elapsed,
+                done / elapsed if elapsed else 0.0)
+    if failed:
+        logger.warning("%d 家企业生成失败: %s", len(failed), ", ".join(failed[:20]))
+
+    if args.zip:
+        write_zip(args.out, args.zip)
+        logger.info("已打包到 %s", args.zip)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
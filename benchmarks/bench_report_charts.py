@@ -0,0 +1,91 @@
+"""
+PDF报告图表后端对比基准：ReportLab矢量图 vs Plotly + kaleido PNG
+
+用法：
+    python benchmarks/bench_report_charts.py [--repeat 5] [--companies 50]
+
+输出每种后端单份报告的平均耗时与PDF大小。kaleido 路径需要本机可用的 Chrome；
+不可用时 fig_to_image 会退回空白图片，此时结果只反映图片编码开销，会在输出中注明。
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from panel_index import PanelIndex, sort_panel  # noqa: E402
+from panel_store import NUMERIC_COLS, apply_schema  # noqa: E402
+from report_fonts import get_report_font  # noqa: E402
+from report_pdf import generate_pdf  # noqa: E402
+
+
+def _sample_panel(n_companies, seed=0):
+    rng = np.random.default_rng(seed)
+    years = np.arange(1999, 2024)
+    n = n_companies * len(years)
+    df = pd.DataFrame({
+        '年份': np.tile(years, n_companies),
+        '企业名称': np.repeat([f"企业{i}" for i in range(n_companies)], len(years)),
+        '股票代码': np.repeat([f"{600000 + i}" for i in range(n_companies)], len(years)),
+        '行业名称': np.repeat(rng.choice(['制造业', '金融业', '信息技术'], n_companies), len(years)),
+        '行业代码': 'C1',
+    })
+    for col in NUMERIC_COLS:
+        df[col] = rng.integers(0, 1000, n)
+    return sort_panel(apply_schema(df))
+
+
+def _kaleido_available():
+    try:
+        import plotly.graph_objects as go
+        go.Figure().to_image(format="png", width=10, height=10)
+        return True
+    except Exception:
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PDF图表后端基准")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--companies', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    df = _sample_panel(args.companies)
+    panel_index = PanelIndex(df)
+    company = panel_index.companies[0]
+    company_data = panel_index.company(company)
+    year_range = (int(df['年份'].min()), int(df['年份'].max()))
+
+    # 字体注册不计入图表耗时
+    get_report_font()
+
+    results = {}
+    for backend in ('vector', 'kaleido'):
+        timings = []
+        size = 0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pdf_data = generate_pdf(df, company, year_range, [], company_data, chart_backend=backend)
+            timings.append(time.perf_counter() - start)
+            size = len(pdf_data or b'')
+        results[backend] = (statistics.median(timings), size)
+
+    if not _kaleido_available():
+        print("注意：kaleido 无法使用（缺少 Chrome），kaleido 结果为空白图片回退路径")
+    print(f"{'后端':<10}{'中位耗时(ms)':>14}{'PDF大小(KB)':>14}")
+    for backend, (seconds, size) in results.items():
+        print(f"{backend:<10}{seconds * 1000:>14.1f}{size / 1024:>14.1f}")
+    vector_time, kaleido_time = results['vector'][0], results['kaleido'][0]
+    print(f"矢量路径加速比: {kaleido_time / vector_time:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,161 @@
+"""
+多进程扩展性压测（无需浏览器）
+
+模拟 serve_workers.py 的部署方式：每个工作进程独立运行 app2.py，
+在其中用 Streamlit AppTest 反复建立会话并执行典型交互（切换年份范围、分析视图、搜索并选择企业）。
+依次以 1、2、4…… 个工作进程运行相同时长，统计总的重跑吞吐量、相对单进程的加速比，
+以及各进程的常驻内存与其中和其他进程共享的部分（整表快照的页缓存映射）。
+
+用法：
+    python benchmarks/load_test.py [--workers 1 2 4 8] [--duration 20] [--cache-dir .panel_cache]
+                                   [--companies 2000] [--output load_results.json]
+不指定 --cache-dir 时先用模拟数据生成器写一份临时缓存。
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+APP = os.path.join(ROOT, 'app2.py')
+
+
+def _memory_kb():
+    """常驻内存与其中的共享部分（KB），取自 /proc/self/smaps_rollup"""
+    values = {}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if parts and parts[0] in ('Rss:', 'Shared_Clean:', 'Shared_Dirty:'):
+                    values[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return None, None
+    return values.get('Rss'), values.get('Shared_Clean', 0) + values.get('Shared_Dirty', 0)
+
+
+def _interact(at, rng):
+    """执行一次随机交互"""
+    action = rng.randrange(3)
+    if action == 0:
+        start = rng.randint(1999, 2015)
+        at.sidebar.slider[0].set_value((start, rng.randint(start, 2023))).run()
+    elif action == 1:
+        # 分析视图只在未选择企业时显示
+        if at.sidebar.selectbox[0].value:
+            at.sidebar.selectbox[0].select("").run()
+        at.radio(key='overview_view').set_value(rng.choice(
+            ["总词频趋势", "技术应用对比", "行业数字化分布", "企业数字化排名", "指标相关性分析"]
+        )).run()
+    else:
+        at.sidebar.text_input[0].input(f"企业{rng.randint(1, 9)}").run()
+        options = at.sidebar.selectbox[0].options
+        if len(options) > 1:
+            at.sidebar.selectbox[0].select(options[1].split('（')[0]).run()
+
+
+def _worker(cache_dir, duration, barrier, results, seed):
+    os.environ['PANEL_CACHE_DIR'] = cache_dir
+    os.chdir(tempfile.mkdtemp())
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    # 预热：加载数据、构建进程内共享的索引与缓存
+    AppTest.from_file(APP, default_timeout=300).run()
+    barrier.wait()
+
+    reruns = 0
+    sessions = 0
+    errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        at = AppTest.from_file(APP, default_timeout=300)
+        at.run()
+        sessions += 1
+        reruns += 1
+        for _ in range(rng.randint(2, 5)):
+            if time.perf_counter() >= deadline:
+                break
+            try:
+                _interact(at, rng)
+                reruns += 1
+            except Exception:
+                errors += 1
+        errors += len(at.exception)
+
+    rss, shared = _memory_kb()
+    results.put({'reruns': reruns, 'sessions': sessions, 'errors': errors, 'rss_kb': rss, 'shared_kb': shared})
+
+
+def run(n_workers, cache_dir, duration):
+    ctx = mp.get_context('spawn')
+    barrier = ctx.Barrier(n_workers + 1)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(cache_dir, duration, barrier, results, i)) for i in range(n_workers)]
+    for proc in procs:
+        proc.start()
+    barrier.wait()
+    start = time.perf_counter()
+    stats = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - start
+    for proc in procs:
+        proc.join()
+
+    reruns = sum(item['reruns'] for item in stats)
+    return {
+        'workers': n_workers,
+        'reruns': reruns,
+        'sessions': sum(item['sessions'] for item in stats),
+        'errors': sum(item['errors'] for item in stats),
+        'reruns_per_s': reruns / elapsed,
+        'rss_mb_per_worker': [round((item['rss_kb'] or 0) / 1024, 1) for item in stats],
+        'shared_mb_per_worker': [round((item['shared_kb'] or 0) / 1024, 1) for item in stats],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="app2.py 多进程扩展性压测")
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4], help="依次测试的工作进程数")
+    parser.add_argument('--duration', type=float, default=20, help="每轮持续秒数")
+    parser.add_argument('--cache-dir', help="已构建的列式缓存目录")
+    parser.add_argument('--companies', type=int, default=2000, help="未指定缓存时模拟数据的企业数")
+    parser.add_argument('--output', default='load_results.json', help="结果JSON文件")
+    args = parser.parse_args(argv)
+
+    if args.cache_dir:
+        from panel_store import ensure_snapshot
+        cache_dir = os.path.abspath(args.cache_dir)
+        ensure_snapshot(cache_dir)
+    else:
+        from panel_store import write_panel
+        from synthetic_panel import generate_panel
+        cache_dir = tempfile.mkdtemp(prefix='panel_load_')
+        write_panel(generate_panel(args.companies, seed=0), cache_dir, origin=f"load_test:{args.companies}")
+
+    print(f"CPU核数 {os.cpu_count()}，缓存 {cache_dir}")
+    print(f"{'进程数':>6}{'重跑/秒':>10}{'加速比':>8}{'会话数':>8}{'错误':>6}  每进程常驻/共享(MB)")
+    rounds = []
+    for n_workers in args.workers:
+        result = run(n_workers, cache_dir, args.duration)
+        result['speedup'] = result['reruns_per_s'] / rounds[0]['reruns_per_s'] if rounds else 1.0
+        rounds.append(result)
+        memory = ", ".join(f"{rss}/{shared}" for rss, shared in
+                           zip(result['rss_mb_per_worker'], result['shared_mb_per_worker']))
+        print(f"{n_workers:>6}{result['reruns_per_s']:>10.2f}{result['speedup']:>8.2f}"
+              f"{result['sessions']:>8}{result['errors']:>6}  {memory}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'cpu_count': os.cpu_count(), 'duration': args.duration, 'rounds': rounds},
+                  f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
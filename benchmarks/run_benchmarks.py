@@ -0,0 +1,233 @@
+"""
+app2.py 主要路径的性能基准（无需浏览器）
+
+在若干规模的模拟面板上分别计时：数据加载（含应用启动时的完整加载路径）、年份/行业筛选、各概览选项卡的聚合、
+相关性矩阵、图表转图片（fig_to_image）和PDF生成。结果写入JSON文件，
+并可与基线文件比较，超过阈值的变慢项会被标记，进程以非零状态退出。
+
+用法：
+    python benchmarks/run_benchmarks.py [--sizes 500 2000 5000] [--repeat 5] [--output bench.json]
+    python benchmarks/run_benchmarks.py --compare baseline.json [--threshold 0.2]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from correlation_service import PEARSON, WITHIN_INDUSTRY, CorrelationService  # noqa: E402
+from filter_cache import compute_rows  # noqa: E402
+from company_series import CompanySeries  # noqa: E402
+from panel_baseline import IndustryBaseline  # noqa: E402
+from panel_cube import PanelCube  # noqa: E402
+from panel_index import PanelIndex  # noqa: E402
+from panel_store import read_cube_cells, read_panel, write_panel  # noqa: E402
+from report_fonts import get_report_font  # noqa: E402
+from report_pdf import fig_to_image, generate_pdf  # noqa: E402
+from synthetic_panel import generate_panel  # noqa: E402
+
+TECH_METRICS = ['人工智能', '区块链', '大数据', '云计算', '物联网', '5G通信',
+                '数字平台', '数字安全', '智慧行业应用']
+CORRELATION_METRICS = TECH_METRICS + ['总词频', '数字化程度', '技术多样性']
+
+
+def _time(fn, repeat):
+    """执行 repeat 次，返回每次耗时（秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _kaleido_available():
+    try:
+        import plotly.graph_objects as go
+        go.Figure().to_image(format="png", width=10, height=10)
+        return True
+    except Exception:
+        return False
+
+
+def run_size(n_companies, repeat):
+    """在一个规模上运行全部基准，返回结果列表"""
+    results = []
+
+    def record(name, fn, repeat=repeat):
+        timings = _time(fn, repeat)
+        results.append({
+            'name': name,
+            'companies': n_companies,
+            'median_ms': statistics.median(timings) * 1000,
+            'min_ms': min(timings) * 1000,
+            'repeat': repeat,
+        })
+
+    df = generate_panel(n_companies, seed=0)
+    year_range = (2005, 2020)
+    industries = sorted(df['行业名称'].cat.categories[:5])
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        write_panel(df, cache_dir, origin=f"benchmark:{n_companies}")
+        record('load.read_panel', lambda: read_panel(cache_dir))
+        record('load.read_cube_cells', lambda: read_cube_cells(cache_dir))
+
+        def app_load_path():
+            # 与 app2.py 启动时一致：读取缓存数据，再构建企业/行业索引与预聚合立方体
+            panel = read_panel(cache_dir)
+            PanelIndex(panel)
+            PanelCube(cells=read_cube_cells(cache_dir))
+
+        record('load.app_path', app_load_path)
+
+    record('build.panel_index', lambda: PanelIndex(df))
+    record('build.panel_cube', lambda: PanelCube(df), repeat=max(1, repeat // 2))
+
+    panel_index = PanelIndex(df)
+    panel_cube = PanelCube(df)
+    frame = panel_index.frame
+
+    def boolean_mask():
+        filtered = frame[(frame['年份'] >= year_range[0]) & (frame['年份'] <= year_range[1])]
+        return filtered[filtered['行业名称'].isin(industries)]
+
+    record('filter.boolean_mask', boolean_mask)
+    record('filter.index_rows', lambda: compute_rows(panel_index, year_range, industries))
+
+    filtered_df = frame.take(compute_rows(panel_index, year_range, industries))
+
+    record('tab.trend.groupby', lambda: filtered_df.groupby('年份', observed=True)['总词频'].mean())
+    record('tab.trend.cube', lambda: panel_cube.rollup('年份', ['总词频'], year_range, industries))
+    record('tab.tech.mean', lambda: filtered_df[TECH_METRICS].mean())
+    record('tab.tech.cube', lambda: panel_cube.rollup(None, TECH_METRICS, year_range, industries))
+    record('tab.industry.groupby', lambda: filtered_df.groupby('行业名称', observed=True)['数字化程度'].mean())
+    record('tab.industry.cube', lambda: panel_cube.rollup('行业名称', ['数字化程度'], year_range, industries))
+    record('tab.top20.groupby', lambda: filtered_df.groupby('企业名称', observed=True)['数字化程度'].mean().nlargest(20))
+    record('tab.top20.cube', lambda: panel_cube.rollup('企业名称', ['数字化程度'], year_range, industries)['数字化程度'].nlargest(20))
+    record('correlation.pearson', lambda: filtered_df[CORRELATION_METRICS].corr())
+    record('build.correlation_service', lambda: CorrelationService(frame), repeat=max(1, repeat // 2))
+    correlation_service = CorrelationService(frame, maxsize=0)
+    record('correlation.pearson.cells',
+           lambda: correlation_service.correlation(CORRELATION_METRICS, None, PEARSON, year_range, industries))
+    record('correlation.within_industry.cells',
+           lambda: correlation_service.correlation(CORRELATION_METRICS, None, WITHIN_INDUSTRY, year_range, industries))
+
+    company = panel_index.companies[0]
+    company_data = panel_index.company(company, year_range, industries)
+    company_industry = company_data['行业名称'].iloc[0]
+
+    record('build.industry_baseline', lambda: IndustryBaseline(frame), repeat=max(1, repeat // 2))
+    industry_baseline = IndustryBaseline(frame)
+    record('company.industry_compare.groupby',
+           lambda: panel_index.industry(company_industry).groupby('年份', observed=True)['数字化程度'].mean())
+    record('company.industry_compare.baseline',
+           lambda: industry_baseline.lookup(company_industry, '数字化程度'))
+    record('build.company_series', lambda: CompanySeries(frame), repeat=max(1, repeat // 2))
+    company_series = CompanySeries(frame)
+    record('build.company_series.groupby',
+           lambda: frame.groupby('企业名称', observed=True)[TECH_METRICS].transform(lambda s: s.rolling(3).mean()),
+           repeat=max(1, repeat // 2))
+    record('company.series.precomputed', lambda: company_series.company(company_data, ['人工智能']))
+
+    if _kaleido_available():
+        import plotly.express as px
+        trend = filtered_df.groupby('年份', observed=True)['总词频'].mean().reset_index()
+        record('render.fig_to_image', lambda: fig_to_image(px.line(trend, x='年份', y='总词频'), width=800, height=400),
+               repeat=max(1, repeat // 2))
+
+    get_report_font()
+    record('pdf.generate_pdf.vector',
+           lambda: generate_pdf(filtered_df, company, year_range, industries, company_data),
+           repeat=max(1, repeat // 2))
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """与基线比较，返回变慢超过阈值的条目"""
+    base = {(item['name'], item['companies']): item for item in baseline['results']}
+    regressions = []
+    for item in results:
+        previous = base.get((item['name'], item['companies']))
+        if previous is None or previous['median_ms'] <= 0:
+            continue
+        ratio = item['median_ms'] / previous['median_ms'] - 1
+        if ratio > threshold:
+            regressions.append((item, previous, ratio))
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="app2.py 性能基准")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[500, 2000, 5000], help="模拟面板的企业数")
+    parser.add_argument('--repeat', type=int, default=5, help="每项重复次数")
+    parser.add_argument('--output', default='bench_results.json', help="结果JSON文件")
+    parser.add_argument('--compare', help="基线JSON文件")
+    parser.add_argument('--threshold', type=float, default=0.2, help="判定变慢的相对阈值（0.2 即 20%%）")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+
+    # 先读入基线，避免 --output 与 --compare 为同一文件时基线被本次结果覆盖
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args.repeat))
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"{'项目':<28}{'企业数':>8}{'中位(ms)':>12}{'最小(ms)':>12}")
+    for item in results:
+        print(f"{item['name']:<30}{item['companies']:>8}{item['median_ms']:>12.2f}{item['min_ms']:>12.2f}")
+    print(f"结果已写入 {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项变慢超过 {args.threshold:.0%}:")
+            for item, previous, ratio in regressions:
+                print(f"  {item['name']} ({item['companies']}): {previous['median_ms']:.2f}ms -> "
+                      f"{item['median_ms']:.2f}ms (+{ratio:.0%})")
+            return 1
+        print(f"\n与基线相比无超过 {args.threshold:.0%} 的变慢")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+"""
+企业搜索索引
+
+对企业名称、股票代码和名称拼音首字母（需安装 pypinyin，未安装时跳过）预先建立排序后的检索键，
+前缀匹配用二分查找定位，其次是名称子串匹配，都没有结果时再用 difflib 做模糊匹配。
+侧边栏只把前 N 个匹配结果交给下拉框，而不是每次重跑都下发全部企业名称。
+"""
+import bisect
+import difflib
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # 拼音首字母检索为可选功能
+    lazy_pinyin = None
+
+COMPANY_COL = '企业名称'
+CODE_COL = '股票代码'
+
+DEFAULT_LIMIT = 50
+
+
+def pinyin_initials(name):
+    """名称的拼音首字母（小写）；未安装 pypinyin 时返回空串"""
+    if lazy_pinyin is None:
+        return ''
+    return ''.join(lazy_pinyin(name, style=Style.FIRST_LETTER, errors='default')).lower()
+
+
+class CompanySearch:
+    """企业名称 / 股票代码 / 拼音首字母的前缀与模糊检索"""
+
+    def __init__(self, df):
+        firms = df.drop_duplicates(COMPANY_COL)
+        self.names = [str(name) for name in firms[COMPANY_COL]]
+        codes = firms[CODE_COL].astype(str).tolist() if CODE_COL in firms.columns else [''] * len(self.names)
+        self.codes = dict(zip(self.names, codes))
+        self._lower_names = [name.lower() for name in self.names]
+        self._position = {name: i for i, name in enumerate(self._lower_names)}
+
+        # 各检索字段的（键, 企业序号）按键排序，前缀查询即一段连续区间
+        self._keys = []
+        for values in (self._lower_names, codes, [pinyin_initials(name) for name in self.names]):
+            pairs = sorted((value, i) for i, value in enumerate(values) if value)
+            self._keys.append(([key for key, _ in pairs], [i for _, i in pairs]))
+
+    def __len__(self):
+        return len(self.names)
+
+    def _prefix(self, query, limit):
+        matches = []
+        for keys, positions in self._keys:
+            start = bisect.bisect_left(keys, query)
+            stop = bisect.bisect_left(keys, query + '\uffff', lo=start)
+            matches.extend(positions[start:min(stop, start + limit)])
+        return matches
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """返回最多 limit 个匹配的企业名称：完全匹配、前缀匹配、子串匹配依次排列，均无结果时返回模糊匹配"""
+        query = (query or '').strip().lower()
+        if not query:
+            return []
+
+        seen = set()
+        results = []
+
+        def add(positions):
+            for i in positions:
+                if i not in seen and len(results) < limit:
+                    seen.add(i)
+                    results.append(self.names[i])
+
+        prefix = self._prefix(query, limit)
+        add(sorted(prefix, key=lambda i: (self._lower_names[i] != query and self.codes[self.names[i]] != query,
+                                          len(self.names[i]))))
+        if len(results) < limit:
+            add(i for i, name in enumerate(self._lower_names) if query in name)
+        if not results:
+            # 精确检索无结果时才做代价较高的模糊匹配
+            close = difflib.get_close_matches(query, self._lower_names, n=limit - len(results), cutoff=0.5)
+            add(self._position[name] for name in close)
+        return results
@@ -0,0 +1,125 @@
+"""
+企业时间序列衍生指标
+
+在按（企业名称, 年份）排序的面板上，用 NumPy 分段运算一次性为全部企业计算：
+- 同比变化：与上一年的差值（上一年缺失时为空）；
+- 滚动3年 / 5年均值：按年份窗口（而非行数）计算，企业数据年限不足一个窗口时为空；
+- CAGR：自企业首个取值为正的年份起至当年的年均复合增长率（%）。
+结果作为与面板行一一对应的附加列缓存，企业页面的图表与明细表直接按行号取用。
+"""
+import numpy as np
+import pandas as pd
+
+from panel_index import _group_bounds
+
+COMPANY_COL = '企业名称'
+YEAR_COL = '年份'
+
+TECH_METRICS = ['人工智能', '区块链', '大数据', '云计算', '物联网', '5G通信',
+                '数字平台', '数字安全', '智慧行业应用']
+# 增长率本身是比率，只计算同比变化与滚动均值，不计算 CAGR
+RATE_METRICS = ['年度增长率']
+
+ROLLING_WINDOWS = (3, 5)
+YOY_SUFFIX = '_同比变化'
+CAGR_SUFFIX = '_CAGR'
+
+
+def rolling_suffix(window):
+    return f'_{window}年均值'
+
+
+def _rolling_mean(values, keys, first_years, years, window):
+    """按年份窗口 (year-window, year] 的分段滚动均值，忽略缺失值"""
+    lo = np.searchsorted(keys, keys - (window - 1), side='left')
+    hi = np.arange(1, len(keys) + 1)
+    valid = ~np.isnan(values)
+    sums = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    counts = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(valid, axis=0)])
+    window_sums = sums[hi] - sums[lo]
+    window_counts = counts[hi] - counts[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = window_sums / window_counts
+    result[window_counts == 0] = np.nan
+    result[first_years > years - window + 1] = np.nan
+    return result
+
+
+def _yoy_delta(values, group_ids, years):
+    result = np.full(values.shape, np.nan)
+    if len(values) > 1:
+        consecutive = (group_ids[1:] == group_ids[:-1]) & (years[1:] == years[:-1] + 1)
+        result[1:][consecutive] = values[1:][consecutive] - values[:-1][consecutive]
+    return result
+
+
+def _cagr(values, group_ids, starts, years):
+    """自各企业首个正值年份起的年均复合增长率（%）"""
+    n = len(values)
+    positions = np.arange(n)[:, None]
+    positive = values > 0
+    first_positive = np.minimum.reduceat(np.where(positive, positions, n), starts, axis=0)
+    base = first_positive[group_ids]
+    valid = positive & (base < positions)
+    base = np.minimum(base, n - 1)
+    span = years[:, None] - years[base]
+    valid &= span > 0
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        ratio = values / np.take_along_axis(values, base, axis=0)
+        result = (ratio ** (1.0 / span) - 1) * 100
+    return np.where(valid, result, np.nan)
+
+
+class CompanySeries:
+    """与面板行对齐的同比、滚动均值与 CAGR 附加列"""
+
+    def __init__(self, df, metrics=None):
+        if metrics is None:
+            metrics = [col for col in TECH_METRICS + RATE_METRICS if col in df.columns]
+        self.metrics = list(metrics)
+
+        company_codes = df[COMPANY_COL].cat.codes.to_numpy().astype(np.int64)
+        years = df[YEAR_COL].to_numpy().astype(np.int64)
+        # 面板通常已按（企业, 年份）排序，此时 order 即恒等排列
+        order = np.lexsort((years, company_codes))
+        company_codes, years = company_codes[order], years[order]
+        values = df[self.metrics].to_numpy(dtype=np.float64)[order]
+
+        _, starts, stops = _group_bounds(company_codes)
+        group_ids = np.repeat(np.arange(len(starts)), stops - starts)
+        first_years = years[starts][group_ids]
+        # 年份不超过四位，组合键在各企业内连续且有序，窗口起点可直接二分查找
+        keys = company_codes * 10000 + years
+
+        blocks = {YOY_SUFFIX: _yoy_delta(values, group_ids, years)}
+        for window in ROLLING_WINDOWS:
+            blocks[rolling_suffix(window)] = _rolling_mean(values, keys, first_years, years, window)
+        level = [i for i, metric in enumerate(self.metrics) if metric not in RATE_METRICS]
+        cagr = np.full(values.shape, np.nan)
+        if level and len(values):
+            cagr[:, level] = _cagr(values[:, level], group_ids, starts, years)
+
+        columns = {}
+        for i, metric in enumerate(self.metrics):
+            for suffix, block in blocks.items():
+                columns[metric + suffix] = block[:, i]
+            if metric not in RATE_METRICS:
+                columns[metric + CAGR_SUFFIX] = cagr[:, i]
+
+        table = np.column_stack(list(columns.values())) if columns else np.empty((len(df), 0))
+        restored = np.empty_like(table)
+        restored[order] = table
+        self.table = pd.DataFrame(restored, index=df.index, columns=list(columns))
+
+    def columns(self, metric):
+        """某指标的衍生列名"""
+        suffixes = [YOY_SUFFIX] + [rolling_suffix(window) for window in ROLLING_WINDOWS]
+        if metric not in RATE_METRICS:
+            suffixes.append(CAGR_SUFFIX)
+        return [metric + suffix for suffix in suffixes]
+
+    def company(self, company_data, metrics=None):
+        """企业各行的衍生指标，行索引与 company_data 一致"""
+        columns = self.table.columns if metrics is None else \
+            [col for metric in metrics for col in self.columns(metric)]
+        return self.table.loc[company_data.index, columns]
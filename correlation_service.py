@@ -0,0 +1,145 @@
+"""
+相关性计算服务
+
+按（年份, 行业名称）对所有数值指标保存成对的充分统计量：共同非空样本数 n、Σx、Σx²、Σxy。
+任意年份范围与行业组合下的 Pearson 相关系数只需把对应单元格相加后组装，不再扫描原始记录；
+行业内（去行业均值）相关同样可由各行业的单元格和得到。
+Spearman 需要秩，无法由单元格组装，在筛选后的行上计算。
+三种模式的结果都按（模式, 指标集合, 筛选键）放入有界LRU缓存，在会话间共享。
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from panel_store import NUMERIC_COLS
+
+YEAR_COL = '年份'
+INDUSTRY_COL = '行业名称'
+
+PEARSON = 'pearson'
+WITHIN_INDUSTRY = 'within_industry'
+SPEARMAN = 'spearman'
+MODES = {PEARSON: 'Pearson', WITHIN_INDUSTRY: '行业内（去行业均值）', SPEARMAN: 'Spearman'}
+
+
+def _pairwise_sums(values):
+    """对一组记录计算成对充分统计量，缺失值按成对剔除处理"""
+    valid = np.isfinite(values)
+    x = np.where(valid, values, 0.0)
+    v = valid.astype(np.float64)
+    n = v.T @ v                  # n[i, j]：i、j 同时非空的记录数
+    sx = x.T @ v                 # sx[i, j]：i、j 同时非空时 x_i 的和
+    sxx = (x * x).T @ v          # sxx[i, j]：同上，x_i² 的和
+    sxy = x.T @ x                # sxy[i, j]：x_i·x_j 的和
+    return np.stack([n, sx, sxx, sxy])
+
+
+def _correlation(sums):
+    """由合计后的充分统计量组装相关系数矩阵"""
+    n, sx, sxx, sxy = sums
+    sy, syy = sx.T, sxx.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _centered(sums):
+    """把合计量转成以组均值为中心的形式（n, 0, 组内平方和, 组内交叉积）"""
+    n, sx, sxx, sxy = sums
+    sy = sx.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        css = np.where(n > 0, sxx - sx * sx / n, 0.0)
+        cxy = np.where(n > 0, sxy - sx * sy / n, 0.0)
+    return np.stack([n, np.zeros_like(sx), css, cxy])
+
+
+class CorrelationService:
+    """由（年份, 行业）单元格组装相关矩阵，并缓存各筛选条件下的结果"""
+
+    def __init__(self, df, metrics=None, maxsize=64):
+        if metrics is None:
+            metrics = [col for col in NUMERIC_COLS if col in df.columns]
+        self.metrics = list(metrics)
+        self._metric_pos = {metric: i for i, metric in enumerate(self.metrics)}
+
+        values = df[self.metrics].to_numpy(dtype=np.float64)
+        groups = df.groupby([YEAR_COL, INDUSTRY_COL], observed=True, sort=True).indices
+        self.keys = pd.DataFrame(list(groups), columns=[YEAR_COL, INDUSTRY_COL])
+        self.cells = np.stack([_pairwise_sums(values[rows]) for rows in groups.values()]) if groups else \
+            np.zeros((0, 4, len(self.metrics), len(self.metrics)))
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _mask(self, year_range=None, industries=None):
+        mask = np.ones(len(self.keys), dtype=bool)
+        if year_range is not None:
+            years = self.keys[YEAR_COL].to_numpy()
+            mask &= (years >= year_range[0]) & (years <= year_range[1])
+        if industries:
+            mask &= self.keys[INDUSTRY_COL].isin(industries).to_numpy()
+        return mask
+
+    def _from_cells(self, metrics, mode, year_range, industries):
+        pos = [self._metric_pos[metric] for metric in metrics]
+        mask = self._mask(year_range, industries)
+        cells = self.cells[mask][:, :, pos][:, :, :, pos]
+        if mode == WITHIN_INDUSTRY:
+            # 先按行业合计再各自去均值，最后把组内平方和与交叉积相加
+            industry_codes, _ = pd.factorize(self.keys[INDUSTRY_COL][mask])
+            sums = sum(
+                _centered(cells[industry_codes == code].sum(axis=0))
+                for code in range(industry_codes.max() + 1)
+            ) if len(cells) else np.zeros((4, len(pos), len(pos)))
+        else:
+            sums = cells.sum(axis=0)
+        return _correlation(sums)
+
+    def correlation(self, metrics, key, mode=PEARSON, year_range=None, industries=None, frame=None):
+        """
+        返回 metrics 间的相关矩阵（DataFrame）。key 为筛选键（见 filter_cache.filter_key）；
+        mode 为 SPEARMAN 时需传入筛选后的数据 frame。
+        """
+        if mode not in MODES:
+            raise ValueError(f"不支持的相关性模式: {mode}")
+        cache_key = (mode, tuple(metrics), key)
+        with self._lock:
+            result = self._entries.get(cache_key)
+            if result is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        if mode == SPEARMAN:
+            result = frame[list(metrics)].corr(method='spearman')
+        else:
+            result = pd.DataFrame(
+                self._from_cells(metrics, mode, year_range, industries),
+                index=list(metrics), columns=list(metrics)
+            )
+
+        with self._lock:
+            self._entries[cache_key] = result
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._entries),
+        }
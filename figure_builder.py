@@ -0,0 +1,308 @@
+"""
+页面图表构建与缓存
+
+各视图的 Plotly 图表在这里统一构建：
+- 按（视图, 筛选键/企业键）缓存构建好的图表对象，进程内共享，相同条件的重跑不再重新聚合与构图；
+- 长序列折线按 LTTB（Largest-Triangle-Three-Buckets）降采样，保留形状的同时限制点数；
+- 所有图表使用同一个精简模板，代替 Plotly 默认模板随每张图重复下发的大段样式。
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+
+TEMPLATE_NAME = 'app_light'
+MAX_LINE_POINTS = 500
+
+TECH_METRICS = ['人工智能', '区块链', '大数据', '云计算', '物联网', '5G通信',
+                '数字平台', '数字安全', '智慧行业应用']
+
+# 精简模板：只保留配色、字体、边距与坐标轴的基本样式
+pio.templates[TEMPLATE_NAME] = go.layout.Template(layout=dict(
+    colorway=px.colors.qualitative.Plotly,
+    font=dict(size=12),
+    margin=dict(l=50, r=20, t=60, b=40),
+    xaxis=dict(gridcolor='#eeeeee', zeroline=False),
+    yaxis=dict(gridcolor='#eeeeee', zeroline=False),
+    plot_bgcolor='white',
+))
+
+
+def lttb_indices(x, y, n_out):
+    """LTTB 降采样，返回保留点的下标（含首尾两点）"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start = stop
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(frame, x, y, max_points=MAX_LINE_POINTS):
+    """超过 max_points 的折线数据按 LTTB 降采样"""
+    if len(frame) <= max_points:
+        return frame
+    frame = frame.dropna(subset=[x, y])
+    return frame.iloc[lttb_indices(frame[x].to_numpy(), frame[y].to_numpy(), max_points)]
+
+
+class FigureCache:
+    """按（视图, 键）缓存图表对象的有界LRU"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, view, key, build, *args, **kwargs):
+        """命中则返回缓存的图表，否则调用 build(*args, **kwargs) 构建并缓存"""
+        cache_key = (view, key)
+        with self._lock:
+            fig = self._entries.get(cache_key)
+            if fig is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return fig
+            self.misses += 1
+
+        fig = build(*args, **kwargs)
+
+        with self._lock:
+            self._entries[cache_key] = fig
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return fig
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._entries),
+        }
+
+
+def tech_trend_grid(company_data, company):
+    """企业各项技术指标的 3×3 趋势子图"""
+    fig = make_subplots(
+        rows=3, cols=3,
+        subplot_titles=TECH_METRICS,
+        vertical_spacing=0.08,
+        horizontal_spacing=0.08
+    )
+    for i, tech in enumerate(TECH_METRICS):
+        if tech in company_data.columns:
+            series = downsample(company_data, '年份', tech)
+            fig.add_trace(
+                go.Scatter(
+                    x=series['年份'],
+                    y=series[tech],
+                    mode='lines+markers',
+                    name=tech,
+                    line=dict(width=2),
+                    marker=dict(size=6)
+                ),
+                row=i // 3 + 1, col=i % 3 + 1
+            )
+    fig.update_layout(
+        template=TEMPLATE_NAME,
+        height=800,
+        title_text=f"{company} 技术应用趋势",
+        showlegend=False
+    )
+    return fig
+
+
+def growth_bar(company_data, company):
+    """企业年度增长率柱状图，颜色按增长率映射"""
+    fig = go.Figure(go.Bar(
+        x=company_data['年份'],
+        y=company_data['年度增长率'],
+        marker=dict(color=company_data['年度增长率'], colorscale='RdYlGn', showscale=True,
+                    colorbar=dict(title='增长率 (%)')),
+        hovertemplate='%{x}: %{y:.2f}%<extra></extra>'
+    ))
+    fig.add_hline(y=0, line_dash="dash", line_color="red")
+    fig.update_layout(
+        template=TEMPLATE_NAME,
+        title=f"{company} 年度增长率",
+        xaxis_title="年份",
+        yaxis_title="增长率 (%)"
+    )
+    return fig
+
+
+def industry_comparison(comparison_df, company_rank, company, industry):
+    """企业与行业分位带、均值、中位数的对比图"""
+    years = comparison_df.index
+    fig = go.Figure()
+
+    # 行业分位带：10%~90% 与 25%~75%
+    for low, high, label, color in (
+        ('p10', 'p90', '行业10%~90%分位', 'rgba(0, 0, 255, 0.08)'),
+        ('p25', 'p75', '行业25%~75%分位', 'rgba(0, 0, 255, 0.18)'),
+    ):
+        fig.add_trace(go.Scatter(
+            x=years, y=comparison_df[high], mode='lines',
+            line=dict(width=0), showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=years, y=comparison_df[low], mode='lines',
+            line=dict(width=0), fill='tonexty', fillcolor=color, name=label
+        ))
+
+    fig.add_trace(go.Scatter(
+        x=years, y=comparison_df['mean'], mode='lines+markers', name='行业平均',
+        line=dict(color='blue', width=2), marker=dict(size=8)
+    ))
+    fig.add_trace(go.Scatter(
+        x=years, y=comparison_df['median'], mode='lines', name='行业中位数',
+        line=dict(color='blue', width=1, dash='dash')
+    ))
+    # 企业线，悬停时显示行业内百分位
+    fig.add_trace(go.Scatter(
+        x=years, y=comparison_df['企业数字化程度'], mode='lines+markers', name=company,
+        line=dict(color='red', width=2), marker=dict(size=8),
+        customdata=company_rank.reindex(years).to_numpy() * 100,
+        hovertemplate='%{x}: %{y:.4f}<br>行业内分位: %{customdata:.1f}%<extra></extra>'
+    ))
+    fig.update_layout(
+        template=TEMPLATE_NAME,
+        title=f"{company} 与 {industry} 行业数字化程度对比",
+        xaxis_title="年份",
+        yaxis_title="数字化程度",
+        legend_title="数据来源"
+    )
+    return fig
+
+
+def total_trend_line(trend_data):
+    """总词频年度均值折线图"""
+    trend_data = downsample(trend_data, '年份', '总词频')
+    fig = go.Figure(go.Scatter(
+        x=trend_data['年份'], y=trend_data['总词频'], mode='lines+markers', name='平均总词频'
+    ))
+    fig.update_layout(
+        template=TEMPLATE_NAME,
+        title='总词频年度趋势',
+        hovermode='x unified',
+        xaxis_title="年份",
+        yaxis_title="平均总词频"
+    )
+    return fig
+
+
+def tech_mean_bar(tech_data):
+    """各项技术平均词频柱状图（单条轨迹，按类别着色）"""
+    colors = px.colors.qualitative.Plotly
+    fig = go.Figure(go.Bar(
+        x=tech_data['技术'], y=tech_data['平均值'],
+        marker_color=[colors[i % len(colors)] for i in range(len(tech_data))]
+    ))
+    fig.update_layout(
+        template=TEMPLATE_NAME,
+        title='各项技术应用平均值对比',
+        xaxis_title="技术类型",
+        yaxis_title="平均词频",
+        showlegend=False
+    )
+    return fig
+
+
+def industry_bar(industry_data):
+    """行业平均数字化程度水平柱状图"""
+    fig = go.Figure(go.Bar(
+        x=industry_data['数字化程度'], y=industry_data['行业名称'], orientation='h',
+        marker=dict(color=industry_data['数字化程度'], colorscale='Blues', showscale=True)
+    ))
+    fig.update_layout(
+        template=TEMPLATE_NAME,
+        title='行业数字化程度分布',
+        xaxis_title="平均数字化程度",
+        yaxis_title="行业名称",
+        height=max(400, len(industry_data) * 20)
+    )
+    return fig
+
+
+def top_company_bar(company_data):
+    """企业平均数字化程度排名柱状图"""
+    fig = go.Figure(go.Bar(
+        x=company_data['企业名称'], y=company_data['数字化程度'],
+        marker=dict(color=company_data['数字化程度'], colorscale='Viridis', showscale=True)
+    ))
+    fig.update_layout(
+        template=TEMPLATE_NAME,
+        title='企业数字化水平TOP20',
+        xaxis_title="企业名称",
+        yaxis_title="平均数字化程度",
+        xaxis={'categoryorder': 'total descending'}
+    )
+    return fig
+
+
+def correlation_heatmap(correlation_df):
+    """相关系数热力图，数值保留两位小数"""
+    values = correlation_df.to_numpy().round(4)
+    fig = go.Figure(go.Heatmap(
+        z=values, x=list(correlation_df.columns), y=list(correlation_df.index),
+        zmin=-1, zmax=1, colorscale='RdBu_r',
+        text=values, texttemplate='%{text:.2f}'
+    ))
+    fig.update_layout(
+        template=TEMPLATE_NAME,
+        title="指标相关性热力图",
+        yaxis=dict(autorange='reversed'),
+        height=600
+    )
+    return fig
+
+
+def series_trend(company_data, derived, metric, company):
+    """企业某指标的原值与滚动均值（上）及同比变化（下）"""
+    years = company_data['年份']
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.65, 0.35], vertical_spacing=0.08,
+                        subplot_titles=(f"{metric} 及滚动均值", "同比变化"))
+    fig.add_trace(go.Scatter(x=years, y=company_data[metric], mode='lines+markers', name=metric,
+                             line=dict(width=2), marker=dict(size=6)), row=1, col=1)
+    for window, dash in ((3, 'dash'), (5, 'dot')):
+        column = f"{metric}_{window}年均值"
+        if column in derived.columns:
+            fig.add_trace(go.Scatter(x=years, y=derived[column], mode='lines', name=f"滚动{window}年均值",
+                                     line=dict(width=2, dash=dash)), row=1, col=1)
+    delta = derived[f"{metric}_同比变化"]
+    fig.add_trace(go.Bar(x=years, y=delta, name='同比变化',
+                         marker_color=np.where(delta.fillna(0) >= 0, '#2ca02c', '#d62728')), row=2, col=1)
+    fig.update_layout(
+        template=TEMPLATE_NAME,
+        height=600,
+        title_text=f"{company} {metric} 时间序列分析",
+        hovermode='x unified'
+    )
+    return fig
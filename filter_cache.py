@@ -0,0 +1,78 @@
+"""
+筛选结果缓存
+
+按（数据集版本, 年份范围, 排序后的行业列表）缓存筛选命中的行号数组，
+而不是缓存拷贝出来的DataFrame。容量有限，按最近最少使用淘汰；
+实例在进程内共享，同一组筛选条件在不同会话、不同重跑之间都能复用。
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+YEAR_COL = '年份'
+
+
+def filter_key(version, year_range, industries):
+    """规范化筛选条件，得到缓存键"""
+    return (version, int(year_range[0]), int(year_range[1]), tuple(sorted(industries or ())))
+
+
+class FilterCache:
+    """筛选行号的有界LRU缓存，记录命中/未命中次数"""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rows(self, panel_index, year_range, industries, version=''):
+        """返回满足筛选条件的行号（升序，只读）"""
+        key = filter_key(version, year_range, industries)
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return rows
+            self.misses += 1
+
+        rows = compute_rows(panel_index, year_range, industries)
+
+        with self._lock:
+            self._entries[key] = rows
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return rows
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._entries),
+        }
+
+
+def compute_rows(panel_index, year_range, industries):
+    """先取选中行业的行号，再在这部分行上做年份过滤"""
+    frame = panel_index.frame
+    if industries:
+        rows = np.sort(np.concatenate(
+            [panel_index.industry_rows(industry) for industry in industries]
+            + [np.empty(0, dtype=np.int64)]
+        ))
+    else:
+        rows = np.arange(len(frame))
+
+    years = frame[YEAR_COL].to_numpy()[rows]
+    rows = rows[(years >= year_range[0]) & (years <= year_range[1])]
+    rows.flags.writeable = False
+    return rows
@@ -0,0 +1,315 @@
+"""
+面板数据查询接口（HTTP，无页面渲染）
+
+与 app2.py 共用同一份内存映射列式缓存和相同的筛选/聚合逻辑，供其他内部系统直接拉取数据，
+不必抓取页面。结果以 NDJSON 或 Arrow IPC 流分块返回，并带 ETag：
+ETag 由查询涉及年份的分区版本和规范化后的查询参数决定，未变化时返回 304。
+
+接口：
+    GET /meta                         数据集版本、年份范围、行业与指标列表
+    GET /rows?...                     明细记录
+    GET /agg?by=年份&stat=mean&...     按 年份 / 行业名称 / 企业名称 / none 聚合（由预聚合立方体上卷）
+
+查询参数：
+    years=2005-2020         年份范围（默认全部；2020- / -2010 为开放区间）
+    industry=制造业          行业，可重复
+    company=某企业           企业（仅 /rows）
+    metrics=总词频,数字化程度  指标投影（默认全部数值列）
+    format=ndjson|arrow     返回格式，也可通过 Accept: application/vnd.apache.arrow.stream 指定
+
+用法：
+    python panel_api.py [--host 127.0.0.1] [--port 8600] [--cache-dir .panel_cache]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pyarrow as pa
+
+from filter_cache import FilterCache
+from panel_cube import PanelCube
+from panel_index import PanelIndex
+from panel_store import (DEFAULT_CACHE_DIR, DEFAULT_SOURCE, NUMERIC_COLS, STRING_COLS, YEAR_COL, current_version,
+                         load_panel, range_version, read_cube_cells, read_panel)
+
+logger = logging.getLogger(__name__)
+
+NDJSON = 'application/x-ndjson'
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+BATCH_ROWS = 65536
+GROUP_LEVELS = {'年份', '行业名称', '企业名称', 'none'}
+STATS = {'mean', 'sum', 'count', 'std'}
+KEY_COLS = [YEAR_COL] + STRING_COLS
+
+
+class QueryError(ValueError):
+    """查询参数不合法（返回 400）"""
+
+
+class PanelService:
+    """持有当前数据集及其索引、立方体；缓存版本变化时重新加载"""
+
+    def __init__(self, source=DEFAULT_SOURCE, cache_dir=DEFAULT_CACHE_DIR):
+        self.source = source
+        self.cache_dir = cache_dir
+        self.filter_cache = FilterCache(maxsize=64)
+        self._lock = threading.Lock()
+        self._state = None
+
+    def _load(self):
+        # 源Excel不在本机时直接读取已构建的缓存
+        if os.path.exists(self.source):
+            df = load_panel(self.source, self.cache_dir)
+        else:
+            df = read_panel(self.cache_dir)
+        panel_index = PanelIndex(df)
+        cube = PanelCube(cells=read_cube_cells(self.cache_dir))
+        return {
+            'version': df.attrs.get('dataset_version', ''),
+            'partition_versions': df.attrs.get('partition_versions', {}),
+            'index': panel_index,
+            'cube': cube,
+        }
+
+    def state(self):
+        """返回当前数据集；缓存已被重建或增量导入时自动切换到新版本"""
+        version = current_version(self.cache_dir)
+        state = self._state
+        if state is not None and state['version'] == version:
+            return state
+        with self._lock:
+            if self._state is None or self._state['version'] != current_version(self.cache_dir):
+                self._state = self._load()
+                logger.info("已加载数据集版本 %s（%d 行）", self._state['version'], len(self._state['index'].frame))
+            return self._state
+
+
+def _single(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def parse_query(params, frame):
+    """把查询参数规范化为筛选条件"""
+    years = frame[YEAR_COL]
+    year_range = (int(years.min()), int(years.max()))
+    if _single(params, 'years'):
+        # 2005-2020；单个年份 2015；开放区间 2020- / -2010 取到数据的首尾年份
+        text = _single(params, 'years').strip()
+        start, sep, stop = text.partition('-')
+        try:
+            start = int(start) if start.strip() else year_range[0]
+            stop = int(stop) if stop.strip() else (year_range[1] if sep else start)
+        except ValueError:
+            raise QueryError("years 应为 起始年-结束年，如 2005-2020、2020- 或 -2010")
+        if start > stop:
+            raise QueryError(f"years 起始年 {start} 晚于结束年 {stop}")
+        year_range = (start, stop)
+
+    industries = sorted(set(params.get('industry', [])))
+    unknown = [name for name in industries if name not in frame['行业名称'].cat.categories]
+    if unknown:
+        raise QueryError(f"未知行业: {', '.join(unknown)}")
+
+    available = [col for col in NUMERIC_COLS if col in frame.columns]
+    metrics = [m for m in (_single(params, 'metrics') or '').split(',') if m] or available
+    unknown = [m for m in metrics if m not in available]
+    if unknown:
+        raise QueryError(f"未知指标: {', '.join(unknown)}")
+
+    return {
+        'year_range': year_range,
+        'industries': industries,
+        'company': _single(params, 'company'),
+        'metrics': metrics,
+        'by': _single(params, 'by', '年份'),
+        'stat': _single(params, 'stat', 'mean'),
+    }
+
+
+def query_rows(state, query, filter_cache):
+    """/rows：按企业切片或按筛选行号取出明细，并做列投影"""
+    panel_index = state['index']
+    columns = [col for col in KEY_COLS if col in panel_index.frame.columns] + query['metrics']
+    if query['company']:
+        data = panel_index.company(query['company'], query['year_range'], query['industries'])[columns]
+    else:
+        rows = filter_cache.rows(panel_index, query['year_range'], query['industries'], state['version'])
+        # 先做列投影再按行号取出，只复制需要返回的列
+        data = panel_index.frame[columns].take(rows)
+    return data.reset_index(drop=True)
+
+
+def query_agg(state, query):
+    """/agg：由预聚合立方体上卷"""
+    if query['by'] not in GROUP_LEVELS:
+        raise QueryError(f"by 应为 {' / '.join(sorted(GROUP_LEVELS))}")
+    if query['stat'] not in STATS:
+        raise QueryError(f"stat 应为 {' / '.join(sorted(STATS))}")
+    by = None if query['by'] == 'none' else query['by']
+    result = state['cube'].rollup(by, query['metrics'], query['year_range'], query['industries'] or None,
+                                  stat=query['stat'])
+    return result.reset_index().rename(columns={'index': '分组'})
+
+
+def query_etag(state, path, query, fmt):
+    """只依赖查询范围内年份的分区版本，新增年份不会使历史范围的ETag失效"""
+    version = range_version(state['partition_versions'], query['year_range'], default=state['version'])
+    payload = json.dumps([version, path, fmt, query], ensure_ascii=False, sort_keys=True)
+    return '"' + hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24] + '"'
+
+
+class _ChunkedWriter:
+    """以 HTTP/1.1 分块传输写出"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        if data:
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        return len(data)
+
+    def flush(self):
+        self.wfile.flush()
+
+    def close(self):
+        if not self.closed:
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+            self.closed = True
+
+
+def write_ndjson(frame, sink):
+    for start in range(0, len(frame), BATCH_ROWS):
+        chunk = frame.iloc[start:start + BATCH_ROWS]
+        data = chunk.to_json(orient='records', lines=True, force_ascii=False).encode('utf-8')
+        sink.write(data if data.endswith(b"\n") else data + b"\n")
+
+
+def write_arrow(frame, sink):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=BATCH_ROWS):
+            writer.write_batch(batch)
+
+
+class PanelRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    service = None
+
+    def log_message(self, fmt, *args):
+        logger.info("%s - %s", self.address_string(), fmt % args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _format(self, params):
+        fmt = _single(params, 'format')
+        if fmt is None:
+            fmt = 'arrow' if ARROW_STREAM in self.headers.get('Accept', '') else 'ndjson'
+        if fmt not in ('ndjson', 'arrow'):
+            raise QueryError("format 应为 ndjson 或 arrow")
+        return fmt
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        try:
+            state = self.service.state()
+            frame = state['index'].frame
+            if url.path == '/meta':
+                years = frame[YEAR_COL]
+                self._send_json(200, {
+                    'dataset_version': state['version'],
+                    'rows': len(frame),
+                    'companies': len(state['index'].companies),
+                    'years': [int(years.min()), int(years.max())],
+                    'industries': state['index'].industries,
+                    'metrics': [col for col in NUMERIC_COLS if col in frame.columns],
+                })
+                return
+            if url.path not in ('/rows', '/agg'):
+                self._send_json(404, {'error': f"未知路径: {url.path}"})
+                return
+
+            query = parse_query(params, frame)
+            fmt = self._format(params)
+            etag = query_etag(state, url.path, query, fmt)
+            if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            result = query_rows(state, query, self.service.filter_cache) if url.path == '/rows' \
+                else query_agg(state, query)
+        except QueryError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception:
+            logger.exception("查询失败: %s", self.path)
+            self._send_json(500, {'error': "内部错误"})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', ARROW_STREAM if fmt == 'arrow' else NDJSON + '; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Dataset-Version', state['version'])
+        self.send_header('X-Row-Count', str(len(result)))
+        self.end_headers()
+
+        sink = _ChunkedWriter(self.wfile)
+        try:
+            (write_arrow if fmt == 'arrow' else write_ndjson)(result, sink)
+            sink.close()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("客户端提前断开: %s", self.path)
+            self.close_connection = True
+
+
+def make_server(host='127.0.0.1', port=8600, source=DEFAULT_SOURCE, cache_dir=DEFAULT_CACHE_DIR):
+    handler = type('Handler', (PanelRequestHandler,), {'service': PanelService(source, cache_dir)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="面板数据查询接口")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help="原始Excel文件")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="列式缓存目录")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    server = make_server(args.host, args.port, args.source, args.cache_dir)
+    server.RequestHandlerClass.service.state()
+    logger.info("查询接口已启动: http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+"""
+行业-年份基准表
+
+加载时一次性计算每个（行业名称, 年份）下所有数值指标的均值、中位数、分位数与样本数，
+并为每条企业记录计算其在同行业同年份内的百分位排名。
+企业与行业的对比图只需查表，不再在每次选择企业时重新筛选整个行业并分组求均值。
+"""
+import pandas as pd
+
+from panel_store import NUMERIC_COLS
+
+YEAR_COL = '年份'
+INDUSTRY_COL = '行业名称'
+
+QUANTILES = {'p10': 0.1, 'p25': 0.25, 'median': 0.5, 'p75': 0.75, 'p90': 0.9}
+RANK_SUFFIX = '_行业分位'
+
+
+class IndustryBaseline:
+    """行业-年份基准统计与企业行业内百分位排名"""
+
+    def __init__(self, df, metrics=None):
+        if metrics is None:
+            metrics = [col for col in NUMERIC_COLS if col in df.columns]
+        self.metrics = list(metrics)
+
+        grouped = df.groupby([INDUSTRY_COL, YEAR_COL], observed=True, sort=True)[self.metrics]
+        stats = {'mean': grouped.mean(), 'count': grouped.count()}
+        quantiles = grouped.quantile(list(QUANTILES.values()))
+        for name, q in QUANTILES.items():
+            stats[name] = quantiles.xs(q, level=-1)
+
+        # 列为（指标, 统计量）的两级索引，行为（行业, 年份）
+        self.table = pd.concat(stats, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+        # 与面板行一一对应的行业内百分位排名（0~1）
+        self.ranks = (
+            df.groupby([INDUSTRY_COL, YEAR_COL], observed=True)[self.metrics]
+            .rank(pct=True)
+            .add_suffix(RANK_SUFFIX)
+        )
+
+    def lookup(self, industry, metric):
+        """某行业某指标按年份的基准统计，列为 mean / median / p10 / p25 / p75 / p90 / count"""
+        try:
+            return self.table.xs(industry, level=INDUSTRY_COL)[metric]
+        except KeyError:
+            return pd.DataFrame(columns=['mean', 'count'] + list(QUANTILES))
+
+    def company_ranks(self, company_data, metric):
+        """企业各年份在行业内的百分位排名"""
+        ranks = self.ranks.loc[company_data.index, metric + RANK_SUFFIX]
+        return pd.Series(ranks.to_numpy(), index=company_data[YEAR_COL].to_numpy(), name=metric)
@@ -0,0 +1,112 @@
+"""
+预聚合数据立方体
+
+按（年份, 行业名称, 企业名称）对所有数值列计算 sum / count / 平方和（单元格表），
+同时保留一个只按（年份, 行业名称）汇总的小立方体。
+概览选项卡在任意年份范围与行业组合下的均值、合计、标准差都由这些单元格上卷得到，
+不再重新扫描原始记录。单元格表按年份可加，可以随年度分区一起落盘、增量追加。
+"""
+import numpy as np
+import pandas as pd
+
+from panel_store import NUMERIC_COLS
+
+YEAR_COL = '年份'
+INDUSTRY_COL = '行业名称'
+COMPANY_COL = '企业名称'
+CUBE_KEYS = [YEAR_COL, INDUSTRY_COL, COMPANY_COL]
+
+COUNT_COL = '__count'
+SQ_SUFFIX = '__sq'
+
+
+def cube_cells(df, metrics=None):
+    """按（年份, 行业名称, 企业名称）计算 count / sum / 平方和，返回单元格表"""
+    if metrics is None:
+        metrics = [col for col in NUMERIC_COLS if col in df.columns]
+    values = df[metrics].astype('float64')
+    group_keys = [df[key] for key in CUBE_KEYS]
+    sums = values.groupby(group_keys, observed=True, sort=True).sum()
+    sumsq = (values ** 2).groupby(group_keys, observed=True, sort=True).sum().add_suffix(SQ_SUFFIX)
+    counts = values.groupby(group_keys, observed=True, sort=True).size().rename(COUNT_COL)
+    return pd.concat([counts.astype('float64'), sums, sumsq], axis=1).reset_index()
+
+
+class _CubeLevel:
+    """某一粒度下的聚合单元格：键列 + count / sum / 平方和矩阵"""
+
+    def __init__(self, cells, keys, metrics):
+        columns = [COUNT_COL] + list(metrics) + [metric + SQ_SUFFIX for metric in metrics]
+        grouped = cells.groupby(keys, observed=True, sort=True)[columns].sum()
+
+        self.keys = grouped.index.to_frame(index=False)
+        self.count = grouped[COUNT_COL].to_numpy(dtype='float64')
+        self.sum = grouped[list(metrics)].to_numpy()
+        self.sumsq = grouped[[metric + SQ_SUFFIX for metric in metrics]].to_numpy()
+
+    def __len__(self):
+        return len(self.count)
+
+    def mask(self, year_range=None, industries=None):
+        mask = np.ones(len(self), dtype=bool)
+        if year_range is not None:
+            years = self.keys[YEAR_COL].to_numpy()
+            mask &= (years >= year_range[0]) & (years <= year_range[1])
+        if industries:
+            mask &= self.keys[INDUSTRY_COL].isin(industries).to_numpy()
+        return mask
+
+
+class PanelCube:
+    """按年份/行业/企业上卷的预聚合立方体"""
+
+    def __init__(self, df=None, metrics=None, cells=None):
+        """由原始数据 df 构建，或直接由（可能按年份分区读取的）单元格表 cells 构建"""
+        if cells is None:
+            cells = cube_cells(df, metrics)
+        if metrics is None:
+            metrics = [col for col in NUMERIC_COLS if col in cells.columns]
+        self.metrics = list(metrics)
+        self._metric_pos = {metric: i for i, metric in enumerate(self.metrics)}
+        self._company_level = _CubeLevel(cells, CUBE_KEYS, self.metrics)
+        self._industry_level = _CubeLevel(cells, [YEAR_COL, INDUSTRY_COL], self.metrics)
+
+    def rollup(self, by, metrics, year_range=None, industries=None, stat='mean'):
+        """
+        在筛选条件下按 by（'年份' / '行业名称' / '企业名称' / None）上卷，
+        stat 可取 'mean'、'sum'、'count'、'std'，返回以分组为索引的DataFrame；
+        by 为 None 时返回单行结果。
+        """
+        level = self._company_level if by == COMPANY_COL else self._industry_level
+        mask = level.mask(year_range, industries)
+        cols = [self._metric_pos[metric] for metric in metrics]
+
+        if by is None:
+            group_codes = np.zeros(int(mask.sum()), dtype=np.int64)
+            labels = pd.Index(['全部'])
+        else:
+            group_codes, labels = pd.factorize(level.keys[by][mask], sort=True)
+            labels = pd.Index(np.asarray(labels), name=by)
+
+        def _bincount(weights):
+            return np.bincount(group_codes, weights=weights, minlength=len(labels))
+
+        count = _bincount(level.count[mask])
+        result = {}
+        for metric, col in zip(metrics, cols):
+            total = _bincount(level.sum[mask, col])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                if stat == 'sum':
+                    result[metric] = total
+                elif stat == 'count':
+                    result[metric] = count
+                elif stat == 'mean':
+                    result[metric] = total / count
+                elif stat == 'std':
+                    total_sq = _bincount(level.sumsq[mask, col])
+                    variance = (total_sq - total ** 2 / count) / (count - 1)
+                    result[metric] = np.sqrt(np.clip(variance, 0, None))
+                else:
+                    raise ValueError(f"不支持的统计量: {stat}")
+
+        return pd.DataFrame(result, index=labels)
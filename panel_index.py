@@ -0,0 +1,88 @@
+"""
+面板数据查找索引
+
+面板按（企业名称, 年份）排序后，每家企业的记录是一段连续的行，
+企业查询只需按预先计算的起止位置切片；行业查询使用预先分组好的行号数组。
+两者都避免了对整张表做布尔扫描。
+"""
+import numpy as np
+
+COMPANY_COL = '企业名称'
+INDUSTRY_COL = '行业名称'
+YEAR_COL = '年份'
+
+
+def sort_panel(df):
+    """按（企业名称, 年份）排序并重建行号"""
+    return df.sort_values([COMPANY_COL, YEAR_COL], kind='stable').reset_index(drop=True)
+
+
+def _group_bounds(codes):
+    """对已排序的编码数组返回每组的起止位置"""
+    if len(codes) == 0:
+        return np.empty(0, dtype=codes.dtype), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stops = np.r_[starts[1:], len(codes)]
+    return codes[starts], starts, stops
+
+
+class PanelIndex:
+    """企业 → 连续行切片、行业 → 行号数组 的查找表"""
+
+    def __init__(self, df):
+        company_codes = df[COMPANY_COL].cat.codes.to_numpy()
+        years = df[YEAR_COL].to_numpy()
+        is_sorted = len(df) < 2 or bool(np.all(
+            (company_codes[1:] > company_codes[:-1])
+            | ((company_codes[1:] == company_codes[:-1]) & (years[1:] >= years[:-1]))
+        ))
+        if not is_sorted:
+            df = sort_panel(df)
+            company_codes = df[COMPANY_COL].cat.codes.to_numpy()
+
+        self.frame = df
+
+        categories = df[COMPANY_COL].cat.categories
+        codes, starts, stops = _group_bounds(company_codes)
+        self._company_slices = {
+            categories[code]: (int(start), int(stop))
+            for code, start, stop in zip(codes, starts, stops)
+        }
+
+        # 行业在企业排序下不一定连续，用稳定排序得到各行业的行号（组内仍按企业、年份有序）
+        industry_codes = df[INDUSTRY_COL].cat.codes.to_numpy()
+        order = np.argsort(industry_codes, kind='stable')
+        codes, starts, stops = _group_bounds(industry_codes[order])
+        categories = df[INDUSTRY_COL].cat.categories
+        self._industry_rows = {
+            categories[code]: order[start:stop]
+            for code, start, stop in zip(codes, starts, stops)
+        }
+
+    @property
+    def companies(self):
+        return list(self._company_slices)
+
+    @property
+    def industries(self):
+        return list(self._industry_rows)
+
+    def company(self, name, year_range=None, industries=None):
+        """返回某企业的全部记录（按年份升序）；可选地再按年份范围和行业过滤这一小段"""
+        bounds = self._company_slices.get(name)
+        if bounds is None:
+            return self.frame.iloc[0:0]
+        data = self.frame.iloc[bounds[0]:bounds[1]]
+        if year_range is not None:
+            data = data[(data[YEAR_COL] >= year_range[0]) & (data[YEAR_COL] <= year_range[1])]
+        if industries:
+            data = data[data[INDUSTRY_COL].isin(industries)]
+        return data
+
+    def industry_rows(self, name):
+        """返回某行业的行号数组"""
+        return self._industry_rows.get(name, np.empty(0, dtype=np.int64))
+
+    def industry(self, name):
+        """返回某行业的全部记录"""
+        return self.frame.take(self.industry_rows(name))
@@ -0,0 +1,430 @@
+"""
+面板数据列式缓存
+
+清洗后的面板数据按年份分区，以 Arrow IPC（Feather v2，未压缩）格式落盘，
+之后通过内存映射读取，避免每次冷启动都用 openpyxl 重新解析 Excel。
+每个分区旁边同时保存该年份的预聚合单元格（见 panel_cube）。
+分区变化后另写一份已按（企业名称, 年份）排序的整表快照，读取时数值列直接映射文件，
+多个工作进程读取同一快照时共享操作系统页缓存，无需各自合并、排序。
+缓存以主数据源文件的 mtime、大小与 SHA-256 作为失效依据，只有源文件内容变化时才重新解析；
+新年度数据通过 ingest 只追加对应年份的分区，其余分区和各分区版本号保持不变。
+
+命令行用法：
+    python panel_store.py build [--source 1_1999-2023.xlsx] [--cache-dir .panel_cache] [--force]
+    python panel_store.py ingest 2024.xlsx [--cache-dir .panel_cache] [--replace]
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from panel_index import sort_panel
+
+DEFAULT_SOURCE = "1_1999-2023.xlsx"
+DEFAULT_CACHE_DIR = os.environ.get("PANEL_CACHE_DIR", ".panel_cache")
+
+META_FILE = "meta.json"
+PARTITION_DIR = "partitions"
+AGGREGATE_DIR = "aggregates"
+SNAPSHOT_PREFIX = "snapshot-"
+
+YEAR_COL = '年份'
+
+# 数值列
+NUMERIC_COLS = ['总词频', '人工智能', '区块链', '大数据', '云计算', '物联网', '5G通信',
+                '数字平台', '数字安全', '智慧行业应用', '企业数字化', '数字运营',
+                '数字人才', '技术多样性', '技术种类数', '数字化程度', '上年总词频',
+                '年度增长率', '行业公司数']
+
+# 字符串列
+STRING_COLS = ['股票代码', '企业名称', '行业代码', '行业名称']
+
+# 词频计数列（取值为非负整数，可向下转换为较窄的整数类型）
+COUNT_COLS = ['总词频', '人工智能', '区块链', '大数据', '云计算', '物联网', '5G通信',
+              '数字平台', '数字安全', '智慧行业应用', '企业数字化', '数字运营',
+              '数字人才', '技术种类数', '上年总词频', '行业公司数']
+
+# 清洗后面板的显式类型约定：名称/行业/代码用分类类型，年份用int16，
+# 计数列向下转换为能容纳取值的最窄整数类型，其余数值列保持float64
+PANEL_SCHEMA = {
+    '年份': 'int16',
+    **{col: 'category' for col in STRING_COLS},
+}
+
+# 清洗规则或类型约定变化时递增，使旧缓存失效
+SCHEMA_VERSION = 4
+
+
+def clean_panel(df):
+    """对原始Excel数据做清洗，返回清洗后的DataFrame"""
+    # 过滤掉企业名称为"0"、空值、NaN的无效记录
+    df = df[~df['企业名称'].isin(['0', '', np.nan, 'nan'])]
+
+    # 确保年份是整数类型
+    df['年份'] = pd.to_numeric(df['年份'], errors='coerce').fillna(0).astype(int)
+
+    # 确保数值列是数值类型
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # 处理缺失值
+    df = df.fillna(0)
+
+    # 字符串列统一转为字符串后再压缩为分类类型，并按（企业名称, 年份）排序以便切片查找
+    return sort_panel(apply_schema(df))
+
+
+def apply_schema(df):
+    """按 PANEL_SCHEMA 压缩列类型，后续的 groupby / isin / == 直接在分类编码上运行"""
+    for col, dtype in PANEL_SCHEMA.items():
+        if col in df.columns:
+            if dtype == 'category':
+                df[col] = df[col].astype(str).astype('category')
+            else:
+                df[col] = df[col].astype(dtype)
+
+    for col in COUNT_COLS:
+        if col in df.columns:
+            values = df[col].to_numpy()
+            # 含小数的列（如源数据已做过平滑）保持原样，避免截断
+            if np.issubdtype(values.dtype, np.floating) and not np.array_equal(values, np.floor(values)):
+                continue
+            df[col] = pd.to_numeric(df[col].astype('int64'), downcast='integer')
+
+    return df
+
+
+def _file_sha256(path, chunk_size=1 << 20):
+    """计算文件的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_meta(cache_dir):
+    meta_path = os.path.join(cache_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    # 先写临时文件再替换，避免并发进程读到半截的元数据
+    meta_path = os.path.join(cache_dir, META_FILE)
+    tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def _partition_path(cache_dir, kind, year):
+    return os.path.join(cache_dir, kind, f"year={int(year)}.arrow")
+
+
+def _write_arrow(df, path):
+    """将DataFrame写为Arrow IPC文件（先写临时文件再替换）"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _read_arrow(path):
+    """以内存映射方式读取Arrow IPC文件"""
+    return ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def _short_hash(*parts):
+    return hashlib.sha256(":".join(str(part) for part in parts).encode('utf-8')).hexdigest()[:16]
+
+
+def dataset_version(meta):
+    """由各年度分区版本组成的数据集版本号"""
+    partitions = meta.get('partitions', {})
+    return _short_hash(meta.get('schema_version', 0), *(partitions[year]['version'] for year in sorted(partitions)))
+
+
+def current_version(cache_dir=DEFAULT_CACHE_DIR):
+    """读取缓存元数据中的数据集版本号（仅读小文件，可在每次重跑时调用）"""
+    return (_read_meta(cache_dir) or {}).get('dataset_version')
+
+
+def range_version(partition_versions, year_range, default=''):
+    """年份范围内各分区版本的组合；新增年份不会改变不包含该年份的范围的版本"""
+    if not partition_versions:
+        return default
+    return _short_hash(*(
+        f"{year}={version}" for year, version in sorted(partition_versions.items())
+        if year_range[0] <= year <= year_range[1]
+    ))
+
+
+def _write_partitions(df, cache_dir, origin_sha256):
+    """按年份写出数据分区与预聚合单元格分区，返回分区元数据"""
+    from panel_cube import cube_cells
+
+    partitions = {}
+    for year, part in df.groupby(YEAR_COL, sort=True):
+        part = part.reset_index(drop=True)
+        _write_arrow(part, _partition_path(cache_dir, PARTITION_DIR, year))
+        _write_arrow(cube_cells(part), _partition_path(cache_dir, AGGREGATE_DIR, year))
+        partitions[str(int(year))] = {
+            'rows': len(part),
+            'version': _short_hash(origin_sha256, int(year), SCHEMA_VERSION),
+        }
+    return partitions
+
+
+def _finish_meta(cache_dir, meta):
+    meta.update({
+        'schema_version': SCHEMA_VERSION,
+        'rows': sum(info['rows'] for info in meta['partitions'].values()),
+        'built_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+    meta['dataset_version'] = dataset_version(meta)
+    meta['snapshot'] = _write_snapshot(cache_dir, meta)
+    _write_meta(cache_dir, meta)
+    return meta
+
+
+def _snapshot_path(cache_dir, version):
+    return os.path.join(cache_dir, f"{SNAPSHOT_PREFIX}{version}.arrow")
+
+
+def _write_snapshot(cache_dir, meta):
+    """合并各年度分区并排序，写成单批次的整表快照，返回快照文件名；旧快照随之清理"""
+    version = meta['dataset_version']
+    path = _snapshot_path(cache_dir, version)
+    # 快照内容由数据集版本唯一确定，已存在时直接复用（也避免覆盖其他进程正在映射的文件）
+    if not os.path.exists(path):
+        df = sort_panel(_sort_categories(_read_partitions(cache_dir, PARTITION_DIR, meta)))
+        table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=max(1, len(table)))
+        os.replace(tmp_path, path)
+    _remove_snapshots(cache_dir, keep=os.path.basename(path))
+    return os.path.basename(path)
+
+
+def _remove_snapshots(cache_dir, keep):
+    """删除 keep 以外的旧快照"""
+    for name in os.listdir(cache_dir):
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith('.arrow') and name != keep:
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                # POSIX 上已映射旧快照的进程不受删除影响；Windows 上仍被其他工作进程映射的文件无法删除，
+                # 留到下次写入快照时再清理
+                continue
+
+
+def _remove_partitions(cache_dir, keep=()):
+    """删除不在 keep 中的年度分区文件"""
+    for kind in (PARTITION_DIR, AGGREGATE_DIR):
+        kind_dir = os.path.join(cache_dir, kind)
+        if os.path.isdir(kind_dir):
+            for name in os.listdir(kind_dir):
+                if name.endswith('.arrow') and name[len('year='):-len('.arrow')] not in keep:
+                    os.remove(os.path.join(kind_dir, name))
+
+
+def is_cache_valid(source=DEFAULT_SOURCE, cache_dir=DEFAULT_CACHE_DIR):
+    """判断缓存是否与源文件一致；mtime与大小一致时跳过哈希计算"""
+    meta = _read_meta(cache_dir)
+    if meta is None or meta.get('schema_version') != SCHEMA_VERSION:
+        return False
+    if not all(
+        os.path.exists(_partition_path(cache_dir, kind, year))
+        for year in meta.get('partitions', {}) for kind in (PARTITION_DIR, AGGREGATE_DIR)
+    ):
+        return False
+
+    stat = os.stat(source)
+    if meta.get('source_mtime') == stat.st_mtime and meta.get('source_size') == stat.st_size:
+        return True
+
+    # mtime变化但内容未变（如重新拷贝文件），只需刷新元数据
+    if meta.get('source_size') == stat.st_size and meta.get('source_sha256') == _file_sha256(source):
+        meta['source_mtime'] = stat.st_mtime
+        _write_meta(cache_dir, meta)
+        return True
+
+    return False
+
+
+def build_cache(source=DEFAULT_SOURCE, cache_dir=DEFAULT_CACHE_DIR):
+    """解析主数据Excel、清洗并按年份写入列式缓存，返回元数据；此前增量导入的年份会被保留"""
+    stat = os.stat(source)
+    sha256 = _file_sha256(source)
+    df = clean_panel(pd.read_excel(source))
+
+    old_meta = _read_meta(cache_dir) or {}
+    partitions = {}
+    ingested = []
+    if old_meta.get('schema_version') == SCHEMA_VERSION:
+        source_years = {str(int(year)) for year in df[YEAR_COL].unique()}
+        ingested = old_meta.get('ingested', [])
+        ingested_years = {str(year) for entry in ingested for year in entry['years']}
+        partitions = {
+            year: info for year, info in old_meta.get('partitions', {}).items()
+            if year in ingested_years and year not in source_years
+        }
+
+    # 清理不再属于数据集的旧分区
+    _remove_partitions(cache_dir, keep=partitions)
+    partitions.update(_write_partitions(df, cache_dir, sha256))
+    return _finish_meta(cache_dir, {
+        'source': os.path.abspath(source),
+        'source_mtime': stat.st_mtime,
+        'source_size': stat.st_size,
+        'source_sha256': sha256,
+        'partitions': partitions,
+        'ingested': ingested,
+    })
+
+
+def write_panel(df, cache_dir=DEFAULT_CACHE_DIR, origin='dataframe'):
+    """将已清洗的DataFrame直接写为年度分区缓存（替换缓存中的全部分区），返回元数据"""
+    _remove_partitions(cache_dir)
+    partitions = _write_partitions(df, cache_dir, _short_hash(origin))
+    return _finish_meta(cache_dir, {
+        'source': origin,
+        'partitions': partitions,
+        'ingested': [],
+    })
+
+
+def ingest(source, cache_dir=DEFAULT_CACHE_DIR, replace=False):
+    """
+    增量导入新年度数据：只清洗并写入源文件中的新年份分区（replace=True 时覆盖已有年份），
+    已有分区及其预聚合结果保持不变。返回写入的年份列表。
+    """
+    meta = _read_meta(cache_dir)
+    if meta is None or meta.get('schema_version') != SCHEMA_VERSION:
+        raise FileNotFoundError(f"缓存 {cache_dir} 不存在或版本过旧，请先执行 build")
+
+    sha256 = _file_sha256(source)
+    df = clean_panel(pd.read_excel(source))
+    if not replace:
+        df = df[~df[YEAR_COL].astype(str).isin(meta['partitions'])]
+    if df.empty:
+        return []
+
+    written = _write_partitions(df, cache_dir, sha256)
+    meta['partitions'].update(written)
+    meta.setdefault('ingested', []).append({
+        'source': os.path.abspath(source),
+        'source_sha256': sha256,
+        'years': sorted(int(year) for year in written),
+        'ingested_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+    _finish_meta(cache_dir, meta)
+    return sorted(int(year) for year in written)
+
+
+def _read_partitions(cache_dir, kind, meta):
+    tables = [_read_arrow(_partition_path(cache_dir, kind, year)) for year in sorted(meta['partitions'], key=int)]
+    # 各分区的字典索引宽度、计数列宽度可能不同，合并时统一放宽
+    return pa.concat_tables(tables, promote_options='permissive').to_pandas(split_blocks=True)
+
+
+def _sort_categories(df):
+    # 各分区字典合并后的类别顺序不一定有序，恢复为字典序
+    for col in STRING_COLS:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    return df
+
+
+def ensure_snapshot(cache_dir=DEFAULT_CACHE_DIR):
+    """为缺少整表快照的缓存（如旧版本构建的缓存）补写快照，返回快照文件名"""
+    meta = _read_meta(cache_dir)
+    if meta is None:
+        raise FileNotFoundError(f"缓存 {cache_dir} 不存在，请先执行 build")
+    snapshot = meta.get('snapshot')
+    if snapshot and os.path.exists(os.path.join(cache_dir, snapshot)):
+        return snapshot
+    meta['snapshot'] = _write_snapshot(cache_dir, meta)
+    _write_meta(cache_dir, meta)
+    return meta['snapshot']
+
+
+def read_panel(cache_dir=DEFAULT_CACHE_DIR):
+    """以内存映射方式读取面板：优先读取已排序的整表快照，没有快照时合并各年度分区"""
+    meta = _read_meta(cache_dir) or {}
+    snapshot = meta.get('snapshot')
+    if snapshot and os.path.exists(os.path.join(cache_dir, snapshot)):
+        # 数值列零拷贝地指向映射的文件缓冲区（只读），分类列只转换编码
+        df = _read_arrow(os.path.join(cache_dir, snapshot)).to_pandas(split_blocks=True)
+    else:
+        df = sort_panel(_sort_categories(_read_partitions(cache_dir, PARTITION_DIR, meta)))
+    df.attrs['dataset_version'] = meta.get('dataset_version', dataset_version(meta))
+    df.attrs['partition_versions'] = {int(year): info['version'] for year, info in meta['partitions'].items()}
+    return df
+
+
+def read_cube_cells(cache_dir=DEFAULT_CACHE_DIR):
+    """读取随分区落盘的预聚合单元格"""
+    meta = _read_meta(cache_dir) or {}
+    return _sort_categories(_read_partitions(cache_dir, AGGREGATE_DIR, meta))
+
+
+def load_panel(source=DEFAULT_SOURCE, cache_dir=DEFAULT_CACHE_DIR):
+    """运行时加载入口：缓存有效则直接映射读取，否则先从Excel重建"""
+    if not is_cache_valid(source, cache_dir):
+        build_cache(source, cache_dir)
+    return read_panel(cache_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="构建面板数据列式缓存")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="从Excel构建缓存")
+    build_parser.add_argument('--source', default=DEFAULT_SOURCE, help="源Excel文件路径")
+    build_parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="缓存目录")
+    build_parser.add_argument('--force', action='store_true', help="忽略现有缓存强制重建")
+
+    ingest_parser = subparsers.add_parser('ingest', help="增量导入新年度数据")
+    ingest_parser.add_argument('source', help="新年度数据Excel文件路径")
+    ingest_parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="缓存目录")
+    ingest_parser.add_argument('--replace', action='store_true', help="覆盖缓存中已存在的年份")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        if not args.force and is_cache_valid(args.source, args.cache_dir):
+            print(f"缓存已是最新: {args.cache_dir}")
+            return 0
+        start = time.perf_counter()
+        meta = build_cache(args.source, args.cache_dir)
+        print(f"已写入 {meta['rows']:,} 行到 {args.cache_dir}，耗时 {time.perf_counter() - start:.2f}s")
+    elif args.command == 'ingest':
+        years = ingest(args.source, args.cache_dir, replace=args.replace)
+        if years:
+            print(f"已导入年份: {', '.join(map(str, years))}")
+        else:
+            print("没有需要导入的新年份")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+"""
+PDF报告磁盘缓存
+
+以（数据集版本, 企业, 年份范围, 排序后的行业, 报告模板版本）的哈希为键，
+把生成好的PDF存到磁盘，进程重启后仍然有效。总大小超过上限时按最近访问时间淘汰
+（命中时刷新文件 mtime）。目录与容量可通过环境变量 REPORT_CACHE_DIR、REPORT_CACHE_MAX_MB 配置。
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR", ".report_cache")
+DEFAULT_MAX_BYTES = int(os.environ.get("REPORT_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+SUFFIX = ".pdf"
+
+
+def report_key(dataset_version, selected_company, year_range, selected_industries, template_version):
+    """报告内容的哈希键"""
+    payload = json.dumps([
+        dataset_version,
+        selected_company or '',
+        [int(year_range[0]), int(year_range[1])],
+        sorted(selected_industries or []),
+        template_version,
+    ], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ReportCache:
+    """按内容寻址、按大小做LRU淘汰的PDF磁盘缓存"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 命中/未命中计数由多个任务线程更新，与淘汰使用不同的锁，避免扫描目录时阻塞计数
+        self._stats_lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + SUFFIX)
+
+    def get(self, key):
+        """读取缓存的PDF，未命中返回None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._stats_lock:
+                self.misses += 1
+            return None
+        with self._stats_lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """写入PDF并按容量上限淘汰最久未访问的文件"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def fill(self, key, build, *args, **kwargs):
+        """调用 build 生成并写入缓存（调用方已用 get 确认未命中，不再重复查找）"""
+        data = build(*args, **kwargs)
+        if data:
+            self.put(key, data)
+        return data
+
+    def get_or_build(self, key, build, *args, **kwargs):
+        """命中直接返回，否则调用 build 生成并写入缓存"""
+        data = self.get(key)
+        if data is None:
+            data = self.fill(key, build, *args, **kwargs)
+        return data
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    # 其他进程可能已删除同一文件
+                    continue
@@ -0,0 +1,92 @@
+"""
+报告字体管理
+
+每个进程只查找并注册一次ReportLab中文字体，之后的报告直接使用已注册的字体名。
+查找顺序：环境变量 REPORT_FONT_DIR 指定的目录 → 项目内 fonts/ 目录 → 常见系统字体路径。
+不再从网络下载字体，离线部署下找不到中文字体时退回ReportLab内置字体。
+"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+FONT_NAME = "ChineseFont"
+FALLBACK_FONT_NAME = "Helvetica"
+
+FONT_DIR_ENV = "REPORT_FONT_DIR"
+BUNDLED_FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+FONT_EXTENSIONS = ('.ttf', '.ttc', '.otf')
+
+SYSTEM_FONT_PATHS = [
+    # Linux
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    # Windows
+    "C:/Windows/Fonts/simhei.ttf",
+    "C:/Windows/Fonts/microsoftyahei.ttf",
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/arial.ttf",
+    "C:/Windows/Fonts/simsun.ttc",
+    # MacOS
+    "/System/Library/Fonts/PingFang.ttc",
+    "/Library/Fonts/Microsoft/SimHei.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/Library/Fonts/SourceHanSansCN-Regular.otf"
+]
+
+_lock = threading.Lock()
+_font_name = None
+
+
+def _fonts_in_dir(font_dir):
+    if not font_dir or not os.path.isdir(font_dir):
+        return []
+    return [
+        os.path.join(font_dir, name)
+        for name in sorted(os.listdir(font_dir))
+        if name.lower().endswith(FONT_EXTENSIONS)
+    ]
+
+
+def candidate_font_paths():
+    """按优先级列出候选字体文件"""
+    return (
+        _fonts_in_dir(os.environ.get(FONT_DIR_ENV))
+        + _fonts_in_dir(BUNDLED_FONT_DIR)
+        + [path for path in SYSTEM_FONT_PATHS if os.path.exists(path)]
+    )
+
+
+def _register():
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    for font_path in candidate_font_paths():
+        try:
+            if font_path.lower().endswith('.ttc'):
+                pdfmetrics.registerFont(TTFont(FONT_NAME, font_path, subfontIndex=0))
+            else:
+                pdfmetrics.registerFont(TTFont(FONT_NAME, font_path))
+            logger.info("成功加载字体: %s", os.path.basename(font_path))
+            return FONT_NAME
+        except Exception as e:
+            # 例如CFF轮廓的.otf，ReportLab无法直接注册
+            logger.debug("字体 %s 注册失败: %s", font_path, e)
+            continue
+
+    logger.info("未找到中文字体，将使用默认字体（部分中文可能显示为方框）")
+    return FALLBACK_FONT_NAME
+
+
+def get_report_font():
+    """返回已注册的报告字体名，首次调用时完成查找与注册"""
+    global _font_name
+    if _font_name is None:
+        with _lock:
+            if _font_name is None:
+                _font_name = _register()
+    return _font_name
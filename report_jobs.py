@@ -0,0 +1,119 @@
+"""
+PDF报告后台任务队列
+
+报告生成在独立的线程池中执行，提交后立即返回任务ID，页面轮询任务状态与进度，
+完成后提供下载。线程池大小即同时渲染的报告数上限，避免突发的导出请求占满服务器，
+拖慢交互会话。上限可通过环境变量 REPORT_MAX_CONCURRENT 配置。
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT = int(os.environ.get("REPORT_MAX_CONCURRENT", "2"))
+
+# 任务状态
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ReportJob:
+    """单个报告任务的状态"""
+
+    def __init__(self, job_id, meta=None):
+        self.job_id = job_id
+        self.meta = dict(meta or {})
+        self.status = PENDING
+        self.progress = 0.0
+        self.message = "排队中"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def update(self, fraction, message):
+        self.progress = max(0.0, min(1.0, float(fraction)))
+        self.message = message
+
+
+class ReportJobQueue:
+    """有并发上限的报告任务队列"""
+
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT, max_jobs=200):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix='pdf-report')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, meta=None, **kwargs):
+        """
+        提交任务并立即返回任务ID。fn 需接受 progress 关键字参数（签名为 progress(fraction, message)），
+        返回值为空视为失败。
+        """
+        job = ReportJob(uuid.uuid4().hex, meta)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.job_id
+
+    def add_completed(self, result, meta=None):
+        """登记一个已有结果的任务（如命中报告缓存），返回任务ID"""
+        job = ReportJob(uuid.uuid4().hex, meta)
+        job.result = result
+        job.status = DONE
+        job.update(1.0, "报告生成完成")
+        job.finished_at = time.time()
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        return job.job_id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            'pending': sum(job.status == PENDING for job in jobs),
+            'running': sum(job.status == RUNNING for job in jobs),
+            'max_concurrent': self.max_concurrent,
+        }
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.update(0.0, "开始生成")
+        try:
+            result = fn(*args, progress=job.update, **kwargs)
+            if not result:
+                raise RuntimeError("报告生成失败，未返回有效内容")
+            job.result = result
+            job.status = DONE
+            job.update(1.0, "报告生成完成")
+        except Exception as e:
+            logger.exception("报告任务 %s 失败", job.job_id)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        # 只保留最近的任务，已完成的旧任务按完成顺序丢弃
+        if len(self._jobs) <= self.max_jobs:
+            return
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        for job in finished[:len(self._jobs) - self.max_jobs]:
+            del self._jobs[job.job_id]
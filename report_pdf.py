@@ -0,0 +1,420 @@
+"""
+PDF分析报告生成
+
+不依赖Streamlit，可在脚本线程、后台任务线程或独立进程中调用；
+运行过程中的提示通过 logging 输出，进度通过可选的 progress 回调上报。
+"""
+import logging
+from io import BytesIO
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from report_charts import trend_drawing
+from report_fonts import get_report_font
+
+logger = logging.getLogger(__name__)
+
+# 报告版式或内容变化时递增，使已缓存的报告失效
+REPORT_TEMPLATE_VERSION = 3
+
+
+def _notify(progress, fraction, message):
+    """向调用方上报进度（0~1）"""
+    if progress is not None:
+        progress(fraction, message)
+
+# 辅助函数：将Plotly图表转换为PIL Image
+def fig_to_image(fig, width=800, height=600):
+    """将Plotly图表转换为PIL Image对象"""
+    try:
+        # 将图表保存为PNG字节流
+        img_bytes = fig.to_image(format="png", width=width, height=height, scale=2)
+        from PIL import Image
+        img = Image.open(BytesIO(img_bytes))
+        return img
+    except Exception as e:
+        logger.warning("图表转换失败: %s", e)
+        # 创建空白图片作为备用
+        from PIL import Image
+        img = Image.new('RGB', (width, height), color='white')
+        return img
+
+# 辅助函数：将PIL Image转换为ReportLab可用格式
+def image_to_reportlab(img, max_width=18, max_height=12):
+    """将PIL Image转换为ReportLab的Image对象"""
+    try:
+        from reportlab.platypus import Image as RLImage
+        from reportlab.lib.units import inch
+        
+        # 保存图片到字节流
+        img_buffer = BytesIO()
+        img.save(img_buffer, format='PNG', dpi=(300, 300))
+        img_buffer.seek(0)
+        
+        # 计算缩放比例
+        img_width, img_height = img.size
+        width_inch = img_width / 300.0
+        height_inch = img_height / 300.0
+        
+        # 调整大小以适应页面
+        if width_inch > max_width:
+            scale = max_width / width_inch
+            width_inch = max_width
+            height_inch = height_inch * scale
+        
+        if height_inch > max_height:
+            scale = max_height / height_inch
+            height_inch = max_height
+            width_inch = width_inch * scale
+        
+        # 创建ReportLab Image对象
+        rl_img = RLImage(img_buffer)
+        rl_img.drawWidth = width_inch * inch
+        rl_img.drawHeight = height_inch * inch
+        
+        return rl_img
+    except Exception as e:
+        logger.warning("图片处理失败: %s", e)
+        return None
+
+# 辅助函数：按趋势数据构建Plotly图表（kaleido路径使用）
+def trend_figure(title, series, empty_text="无数据"):
+    fig = go.Figure()
+    for name, x, y in series:
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            mode='lines+markers',
+            name=name,
+            line=dict(width=2)
+        ))
+    if not series:
+        fig.add_annotation(text=empty_text, x=0.5, y=0.5, showarrow=False)
+    fig.update_layout(
+        height=400,
+        title=title,
+        xaxis_title="年份",
+        yaxis_title="数值",
+        showlegend=True
+    )
+    return fig
+
+# PDF导出功能函数（彻底修复乱码问题）
+def generate_pdf(df, selected_company, year_range, selected_industries, company_data=None, progress=None,
+                 chart_backend='vector', data_version=None):
+    """
+    生成PDF报告；chart_backend 为 'vector'（默认，ReportLab矢量图）或 'kaleido'（Plotly渲染PNG）。
+    报告内容只取决于数据与筛选条件（可被缓存复用），因此标注 data_version 而不是生成时间。
+    """
+    empty_text = "无数据"
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib import colors
+        from reportlab.lib.units import cm
+        from reportlab.lib.enums import TA_CENTER, TA_LEFT
+
+        # 检查数据是否为空
+        if df.empty:
+            logger.error("筛选后的数据为空，无法生成PDF报告")
+            return None
+
+        # 企业数据只取一次；调用方可传入索引切片，避免在整表上做布尔扫描
+        if selected_company and company_data is None and '企业名称' in df.columns:
+            company_data = df[df['企业名称'] == selected_company]
+
+        _notify(progress, 0.05, "加载中文字体")
+        # 中文字体每个进程只注册一次
+        font_name = get_report_font()
+
+        _notify(progress, 0.2, "准备报告样式")
+        # 创建样式（强制指定中文字体）
+        styles = getSampleStyleSheet()
+        
+        # 标题样式（优化中文渲染）
+        title_style = ParagraphStyle(
+            name='MyTitle',
+            fontName=font_name,
+            fontSize=22,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#1E88E5'),
+            spaceAfter=20,
+            leading=26,
+            encoding='utf-8'
+        )
+        
+        # 副标题样式
+        subtitle_style = ParagraphStyle(
+            name='MySubTitle',
+            fontName=font_name,
+            fontSize=18,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#D32F2F'),
+            spaceAfter=10,
+            leading=22,
+            encoding='utf-8'
+        )
+        
+        # 页眉样式
+        header_style = ParagraphStyle(
+            name='MyHeader',
+            fontName=font_name,
+            fontSize=15,
+            alignment=TA_LEFT,
+            textColor=colors.HexColor('#1976D2'),
+            spaceAfter=8,
+            leading=18,
+            encoding='utf-8'
+        )
+        
+        # 普通文本样式（中文优化）
+        normal_style = ParagraphStyle(
+            name='NormalCN',
+            fontName=font_name,
+            fontSize=12,
+            alignment=TA_LEFT,
+            leading=20,  # 增加行高，优化中文显示
+            spaceAfter=6,
+            encoding='utf-8'
+        )
+        
+        styles.add(title_style)
+        styles.add(subtitle_style)
+        styles.add(header_style)
+        styles.add(normal_style)
+
+        # 创建PDF文档（指定编码）
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(
+            buffer, 
+            pagesize=A4, 
+            rightMargin=2*cm, 
+            leftMargin=2*cm, 
+            topMargin=2*cm, 
+            bottomMargin=2*cm,
+            title=f"企业数字化转型分析报告_{selected_company if selected_company else '行业整体'}",
+            author="企业数字化转型数据查询分析系统",
+            encoding='utf-8'
+        )
+        elements = []
+
+        # 封面（确保中文编码）
+        elements.append(Paragraph("企业数字化转型数据分析报告".encode('utf-8').decode('utf-8'), title_style))
+        if selected_company:
+            elements.append(Paragraph(f"{selected_company} 专项分析".encode('utf-8').decode('utf-8'), subtitle_style))
+        else:
+            elements.append(Paragraph("行业整体分析报告".encode('utf-8').decode('utf-8'), subtitle_style))
+        elements.append(Spacer(1, 20))
+
+        _notify(progress, 0.3, "汇总基本信息")
+        # 基本信息
+        elements.append(Paragraph("一、企业基本信息".encode('utf-8').decode('utf-8'), header_style))
+        
+        # 安全地获取数据信息
+        try:
+            record_count = len(df)
+            company_count = df['企业名称'].nunique() if '企业名称' in df.columns else 0
+            industry_count = df['行业名称'].nunique() if '行业名称' in df.columns else 0
+            
+            info_data = [
+                ["企业名称".encode('utf-8').decode('utf-8'), selected_company or "全部企业".encode('utf-8').decode('utf-8')],
+                ["年份范围".encode('utf-8').decode('utf-8'), f"{year_range[0]} - {year_range[1]}"],
+                ["行业".encode('utf-8').decode('utf-8'), ", ".join(selected_industries) if selected_industries else "全部行业".encode('utf-8').decode('utf-8')],
+                ["数据记录数".encode('utf-8').decode('utf-8'), f"{record_count:,} 条".encode('utf-8').decode('utf-8')],
+                ["涉及企业数".encode('utf-8').decode('utf-8'), f"{company_count} 家".encode('utf-8').decode('utf-8')],
+                ["涉及行业数".encode('utf-8').decode('utf-8'), f"{industry_count} 个".encode('utf-8').decode('utf-8')],
+                ["数据版本".encode('utf-8').decode('utf-8'), data_version or "-"]
+            ]
+        except Exception as e:
+            info_data = [
+                ["错误".encode('utf-8').decode('utf-8'), f"数据信息获取失败: {str(e)}"],
+                ["数据版本".encode('utf-8').decode('utf-8'), data_version or "-"]
+            ]
+
+        info_table = Table(info_data, colWidths=[3*cm, 10*cm])
+        info_table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), font_name),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F0F8FF')),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 0.3, colors.grey),
+            ('TEXTENCODING', (0, 0), (-1, -1), 'utf-8')  # 指定文本编码
+        ]))
+        elements.append(info_table)
+        elements.append(Spacer(1, 12))
+
+        # 关键指标
+        elements.append(Paragraph("二、关键指标概览".encode('utf-8').decode('utf-8'), header_style))
+        
+        try:
+            if selected_company and company_data is not None:
+                if not company_data.empty and '年份' in company_data.columns:
+                    latest_year = company_data['年份'].max()
+                    latest_data_df = company_data[company_data['年份'] == latest_year]
+                    if not latest_data_df.empty:
+                        latest_data = latest_data_df.iloc[0]
+                        overview_data = [
+                            ["最新年份".encode('utf-8').decode('utf-8'), str(latest_year)],
+                            ["最新数字化程度".encode('utf-8').decode('utf-8'), f"{latest_data.get('数字化程度', 0):.2f}"],
+                            ["平均数字化程度".encode('utf-8').decode('utf-8'), f"{company_data.get('数字化程度', pd.Series([0])).mean():.2f}"],
+                            ["技术种类数".encode('utf-8').decode('utf-8'), f"{latest_data.get('技术种类数', 0):.0f}"],
+                            ["技术多样性".encode('utf-8').decode('utf-8'), f"{latest_data.get('技术多样性', 0):.2f}"],
+                            ["累计总词频".encode('utf-8').decode('utf-8'), f"{company_data.get('总词频', pd.Series([0])).sum():.0f}"]
+                        ]
+                    else:
+                        overview_data = [["数据".encode('utf-8').decode('utf-8'), "暂无最新年份数据".encode('utf-8').decode('utf-8')]]
+                else:
+                    overview_data = [["数据".encode('utf-8').decode('utf-8'), "企业数据为空".encode('utf-8').decode('utf-8')]]
+            else:
+                overview_data = [
+                    ["企业数量".encode('utf-8').decode('utf-8'), f"{df['企业名称'].nunique() if '企业名称' in df.columns else 0} 家".encode('utf-8').decode('utf-8')],
+                    ["行业数量".encode('utf-8').decode('utf-8'), f"{df['行业名称'].nunique() if '行业名称' in df.columns else 0} 个".encode('utf-8').decode('utf-8')],
+                    ["平均数字化程度".encode('utf-8').decode('utf-8'), f"{df.get('数字化程度', pd.Series([0])).mean():.2f}"],
+                    ["最高数字化程度".encode('utf-8').decode('utf-8'), f"{df.get('数字化程度', pd.Series([0])).max():.2f}"],
+                    ["最低数字化程度".encode('utf-8').decode('utf-8'), f"{df.get('数字化程度', pd.Series([0])).min():.2f}"],
+                    ["平均总词频".encode('utf-8').decode('utf-8'), f"{df.get('总词频', pd.Series([0])).mean():.0f}"]
+                ]
+        except Exception as e:
+            overview_data = [["指标".encode('utf-8').decode('utf-8'), f"指标计算错误: {str(e)}"]]
+
+        overview_table = Table(overview_data, colWidths=[4*cm, 6*cm])
+        overview_table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), font_name),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#E3F2FD')),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 0.3, colors.grey),
+            ('TEXTENCODING', (0, 0), (-1, -1), 'utf-8')
+        ]))
+        elements.append(overview_table)
+        elements.append(Spacer(1, 12))
+
+        _notify(progress, 0.45, "渲染趋势图表")
+        # 可视化图表
+        elements.append(Paragraph("三、数字化可视化数据图表".encode('utf-8').decode('utf-8'), header_style))
+        
+        try:
+            # 整理趋势数据：[(名称, 年份, 数值), ...]
+            if selected_company and company_data is not None and '年份' in df.columns:
+                if not company_data.empty:
+                    chart_title = f"{selected_company} 数字化趋势"
+                    chart_series = [
+                        (metric, company_data['年份'], company_data[metric])
+                        for metric in ['总词频', '数字化程度'] if metric in company_data.columns
+                    ]
+                else:
+                    chart_title, chart_series, empty_text = "无数据", [], "无企业数据"
+            else:
+                # 行业整体趋势
+                if '年份' in df.columns and '总词频' in df.columns:
+                    trend_data = df.groupby('年份', observed=True)['总词频'].mean()
+                    chart_title = '总词频年度趋势'
+                    chart_series = [('总词频', trend_data.index, trend_data.values)]
+                else:
+                    chart_title, chart_series, empty_text = "无数据", [], "无趋势数据"
+            
+            if chart_backend == 'kaleido':
+                # 旧路径：Plotly → kaleido PNG → ReportLab图片
+                fig = trend_figure(chart_title, chart_series, empty_text)
+                img = fig_to_image(fig, width=800, height=400)
+                rl_img = image_to_reportlab(img, max_width=16, max_height=8)
+            else:
+                # 默认路径：直接绘制矢量图
+                rl_img = trend_drawing(chart_title, chart_series, font_name, width=16*cm, height=8*cm, empty_text=empty_text)
+            
+            if rl_img:
+                elements.append(rl_img)
+                elements.append(Spacer(1, 10))
+            else:
+                elements.append(Paragraph("图表生成失败".encode('utf-8').decode('utf-8'), normal_style))
+                
+        except Exception as e:
+            elements.append(Paragraph(f"图表生成失败: {str(e)}".encode('utf-8').decode('utf-8'), normal_style))
+
+        _notify(progress, 0.75, "生成详细数据表")
+        # 详细数据表（前20条）
+        elements.append(Paragraph("四、详细数据（前20条）".encode('utf-8').decode('utf-8'), header_style))
+        
+        try:
+            # 安全地选择显示的列
+            available_cols = df.columns.tolist()
+            preferred_cols = ['年份', '企业名称', '股票代码', '行业名称', '总词频', '数字化程度', '技术种类数', '技术多样性', '年度增长率']
+            display_cols = [col for col in preferred_cols if col in available_cols]
+            
+            if not display_cols:
+                display_cols = available_cols[:6]  # 取前6列作为备用
+                
+            if selected_company and company_data is not None:
+                detail_df = company_data[display_cols]
+                if '年份' in detail_df.columns:
+                    detail_df = detail_df.sort_values('年份', ascending=False)
+            else:
+                detail_df = df[display_cols]
+                sort_cols = []
+                if '行业名称' in detail_df.columns:
+                    sort_cols.append('行业名称')
+                if '企业名称' in detail_df.columns:
+                    sort_cols.append('企业名称')
+                if '年份' in detail_df.columns:
+                    sort_cols.append('年份')
+                if sort_cols:
+                    detail_df = detail_df.sort_values(sort_cols, ascending=[True]*len(sort_cols))
+            
+            # 限制行数并转换为字符串（处理中文编码）
+            detail_df = detail_df.head(20).astype(str)
+            
+            if not detail_df.empty:
+                # 处理中文列名和数据的编码
+                table_header = [col.encode('utf-8').decode('utf-8') for col in display_cols]
+                table_data = [table_header] + [[str(cell).encode('utf-8').decode('utf-8') for cell in row] for row in detail_df.values.tolist()]
+                
+                # 智能自适应列宽
+                col_widths = []
+                for col in display_cols:
+                    max_len = max([len(str(x)) for x in [col] + detail_df[col].tolist()])
+                    col_widths.append(max(2*cm, min(4*cm, max_len * 0.5 * cm)))
+                
+                detail_table = Table(table_data, colWidths=col_widths, repeatRows=1)
+                detail_table.setStyle(TableStyle([
+                    ('FONTNAME', (0, 0), (-1, -1), font_name),
+                    ('FONTSIZE', (0, 0), (-1, 0), 12),
+                    ('FONTSIZE', (0, 1), (-1, -1), 10),
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976D2')),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                    ('GRID', (0, 0), (-1, -1), 0.3, colors.grey),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
+                    ('LINEBELOW', (0, 0), (-1, 0), 1, colors.HexColor('#1976D2')),
+                    ('TEXTENCODING', (0, 0), (-1, -1), 'utf-8')
+                ]))
+                elements.append(detail_table)
+            else:
+                elements.append(Paragraph("无详细数据可显示".encode('utf-8').decode('utf-8'), normal_style))
+                
+        except Exception as e:
+            elements.append(Paragraph(f"详细数据表格生成失败: {str(e)}".encode('utf-8').decode('utf-8'), normal_style))
+        
+        elements.append(Spacer(1, 10))
+
+        _notify(progress, 0.85, "排版PDF文档")
+        # 生成PDF（强制UTF-8编码）
+        doc.build(elements)
+        pdf_data = buffer.getvalue()
+        buffer.close()
+        _notify(progress, 1.0, "报告生成完成")
+        
+        # 验证PDF数据
+        if len(pdf_data) < 100:
+            logger.error("生成的PDF文件无效（文件过小）")
+            return None
+            
+        return pdf_data
+        
+    except Exception as e:
+        logger.exception("PDF生成过程中发生错误: %s", e)
+        return None
@@ -0,0 +1,88 @@
+"""
+单次重跑的分阶段性能记录
+
+默认关闭；设置环境变量 APP_PROFILE=1 或在页面地址加 ?profile=1 后开启。
+开启时按阶段记录耗时与内存变化（tracemalloc），在侧边栏展开面板中展示本次重跑的明细，
+如设置了 APP_PROFILE_LOG，则同时把每个阶段追加写入该 JSONL 文件，便于在生产环境中定位慢交互。
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+
+PROFILE_ENV = "APP_PROFILE"
+PROFILE_LOG_ENV = "APP_PROFILE_LOG"
+
+_log_lock = threading.Lock()
+
+
+def profiling_requested(query_params=None):
+    """环境变量或查询参数是否要求开启性能记录"""
+    if os.environ.get(PROFILE_ENV, '').lower() in ('1', 'true', 'yes'):
+        return True
+    return bool(query_params) and query_params.get('profile') in ('1', 'true')
+
+
+class RerunProfiler:
+    """按顺序划分阶段：begin 会先结束上一个阶段"""
+
+    def __init__(self, enabled=False, log_path=None, session_id=None):
+        self.enabled = enabled
+        self.log_path = log_path if log_path is not None else os.environ.get(PROFILE_LOG_ENV)
+        self.session_id = session_id
+        self.rerun_id = uuid.uuid4().hex[:12]
+        self.spans = []
+        self._current = None
+        self._started = time.perf_counter()
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _memory(self):
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+    def begin(self, name):
+        """开始一个新阶段（并结束当前阶段）"""
+        if not self.enabled:
+            return
+        self.end()
+        self._current = (name, time.perf_counter(), self._memory())
+
+    def end(self):
+        """结束当前阶段"""
+        if not self.enabled or self._current is None:
+            return
+        name, start, memory = self._current
+        self.spans.append({
+            'stage': name,
+            'ms': (time.perf_counter() - start) * 1000,
+            'mem_delta_kb': (self._memory() - memory) / 1024,
+        })
+        self._current = None
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self._started) * 1000
+
+    def finish(self):
+        """结束记录并按需写入JSONL日志，返回各阶段明细；之后的 begin / end 不再记录"""
+        if not self.enabled:
+            return []
+        self.end()
+        self.enabled = False
+        if self.log_path:
+            timestamp = time.strftime('%Y-%m-%dT%H:%M:%S')
+            lines = [
+                json.dumps({
+                    'timestamp': timestamp,
+                    'session_id': self.session_id,
+                    'rerun_id': self.rerun_id,
+                    **span,
+                }, ensure_ascii=False)
+                for span in self.spans
+            ]
+            with _log_lock:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write("\n".join(lines) + "\n")
+        return self.spans
@@ -0,0 +1,164 @@
+"""
+多进程部署启动器
+
+单个 Streamlit 进程受 GIL 限制只能用满一个核。本脚本先构建（或校验）一次列式缓存和整表快照，
+再在连续端口上启动多个 app2.py 工作进程；各进程以内存映射方式读取同一份快照，
+数值列共享操作系统页缓存，不会各自解析Excel或复制整张面板。
+同时生成 nginx 反向代理配置：按客户端地址粘滞（会话状态与下载文件都保存在具体工作进程中），
+并转发 Streamlit 所需的 WebSocket。工作进程异常退出时自动重启。
+
+用法：
+    python serve_workers.py --workers 8 [--base-port 8501] [--host 127.0.0.1]
+                            [--source 1_1999-2023.xlsx] [--cache-dir .panel_cache]
+                            [--nginx-conf nginx_panel.conf] [--listen 8080]
+    nginx -c $(pwd)/nginx_panel.conf        # 或将生成的 upstream/server 段并入现有配置
+"""
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from panel_store import DEFAULT_CACHE_DIR, DEFAULT_SOURCE, build_cache, ensure_snapshot, is_cache_valid
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(ROOT, 'app2.py')
+
+NGINX_TEMPLATE = """\
+# 由 serve_workers.py 生成：{workers} 个 app2.py 工作进程
+worker_processes auto;
+events {{ worker_connections 4096; }}
+
+http {{
+    map $http_upgrade $connection_upgrade {{
+        default upgrade;
+        ''      close;
+    }}
+
+    upstream panel_app {{
+        # 按客户端地址粘滞：Streamlit 会话与其生成的下载文件只存在于一个工作进程中
+        ip_hash;
+{servers}
+    }}
+
+    server {{
+        listen {listen};
+
+        location / {{
+            proxy_pass http://panel_app;
+            proxy_http_version 1.1;
+            proxy_set_header Upgrade $http_upgrade;
+            proxy_set_header Connection $connection_upgrade;
+            proxy_set_header Host $host;
+            proxy_read_timeout 86400;
+            proxy_buffering off;
+        }}
+    }}
+}}
+"""
+
+
+def prepare_cache(source, cache_dir):
+    """只在启动器中构建一次缓存与快照，工作进程启动时只做内存映射"""
+    if os.path.exists(source):
+        if not is_cache_valid(source, cache_dir):
+            logger.info("源文件已变化，重建列式缓存: %s", cache_dir)
+            build_cache(source, cache_dir)
+    snapshot = ensure_snapshot(cache_dir)
+    logger.info("共享数据快照: %s", os.path.join(cache_dir, snapshot))
+
+
+def write_nginx_conf(path, host, ports, listen):
+    servers = "\n".join(f"        server {host}:{port} max_fails=3 fail_timeout=5s;" for port in ports)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(NGINX_TEMPLATE.format(workers=len(ports), servers=servers, listen=listen))
+
+
+def start_worker(host, port, cache_dir):
+    env = dict(os.environ, PANEL_CACHE_DIR=os.path.abspath(cache_dir))
+    return subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', APP,
+         '--server.address', host,
+         '--server.port', str(port),
+         '--server.headless', 'true',
+         '--browser.gatherUsageStats', 'false'],
+        env=env,
+    )
+
+
+def wait_ready(host, port, timeout=60):
+    """等待工作进程的健康检查接口可用"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://{host}:{port}/_stcore/health", timeout=2) as resp:
+                if resp.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="启动多个 app2.py 工作进程并生成反向代理配置")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2), help="工作进程数")
+    parser.add_argument('--base-port', type=int, default=8501, help="第一个工作进程的端口，其余依次递增")
+    parser.add_argument('--host', default='127.0.0.1', help="工作进程监听地址")
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help="原始Excel文件")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="列式缓存目录")
+    parser.add_argument('--nginx-conf', default='nginx_panel.conf', help="生成的 nginx 配置文件")
+    parser.add_argument('--listen', type=int, default=8080, help="反向代理对外端口")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    prepare_cache(args.source, args.cache_dir)
+    ports = [args.base_port + i for i in range(args.workers)]
+    write_nginx_conf(args.nginx_conf, args.host, ports, args.listen)
+    logger.info("已生成反向代理配置 %s（对外端口 %d）", args.nginx_conf, args.listen)
+
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    workers = {port: start_worker(args.host, port, args.cache_dir) for port in ports}
+    try:
+        for port in ports:
+            if stopping:
+                break
+            if wait_ready(args.host, port):
+                logger.info("工作进程就绪: http://%s:%d (pid %d)", args.host, port, workers[port].pid)
+            else:
+                logger.warning("工作进程 %d 未在限定时间内就绪", port)
+
+        while not stopping:
+            time.sleep(1)
+            for port, proc in list(workers.items()):
+                # 终端中按 Ctrl-C 时信号同时送达各工作进程，此时不再重启
+                if not stopping and proc.poll() is not None:
+                    logger.warning("工作进程 %d 已退出（状态 %s），正在重启", port, proc.returncode)
+                    workers[port] = start_worker(args.host, port, args.cache_dir)
+    finally:
+        logger.info("正在停止 %d 个工作进程", len(workers))
+        for proc in workers.values():
+            proc.terminate()
+        for proc in workers.values():
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,73 @@
+"""
+数据表服务端分页
+
+排序、列投影和分页都在服务端完成，每次只把当前页的行交给前端序列化。
+某组筛选结果按某列排序后的行号顺序会被缓存（相当于服务端游标），
+翻页只是对缓存的行号数组切片。
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def sort_rows(frame, rows, sort_col, ascending=True):
+    """按某列对行号排序；取值相同的行无论升序降序都按原行号先后排列"""
+    column = frame[sort_col]
+    # 分类列按编码排序（类别本身已按字典序排列）
+    values = column.cat.codes.to_numpy() if hasattr(column, 'cat') else column.to_numpy()
+    values = values[rows]
+    if values.dtype.kind in 'biu':
+        values = values.astype(np.int64)
+    elif values.dtype.kind != 'f':
+        values = np.unique(values, return_inverse=True)[1]
+    # 降序按取负后的键升序排列，行号作为次要键，而不是把升序结果整体反转
+    order = rows[np.lexsort((rows, values if ascending else -values))]
+    order.flags.writeable = False
+    return order
+
+
+class TablePager:
+    """按（筛选键, 排序列, 升降序）缓存排序后行号的分页器"""
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sorted_rows(self, frame, rows, sort_col, ascending, key):
+        if sort_col is None:
+            return rows
+        if key is None:
+            return sort_rows(frame, rows, sort_col, ascending)
+
+        cache_key = (key, sort_col, ascending)
+        with self._lock:
+            order = self._orders.get(cache_key)
+            if order is not None:
+                self._orders.move_to_end(cache_key)
+                return order
+
+        order = sort_rows(frame, rows, sort_col, ascending)
+
+        with self._lock:
+            self._orders[cache_key] = order
+            while len(self._orders) > self.maxsize:
+                self._orders.popitem(last=False)
+        return order
+
+    def page(self, frame, rows, page, page_size, sort_col=None, ascending=True, columns=None, key=None):
+        """
+        返回 (当前页DataFrame, 总行数, 总页数)。page 从1开始，超出范围时取最后一页；
+        key 标识 rows 所代表的筛选结果，用于缓存排序顺序，为 None 时不缓存。
+        """
+        total = len(rows)
+        n_pages = max(1, -(-total // page_size))
+        page = min(max(1, int(page)), n_pages)
+
+        order = self._sorted_rows(frame, rows, sort_col, ascending, key)
+        page_rows = order[(page - 1) * page_size:page * page_size]
+        page_df = frame.take(page_rows)
+        if columns:
+            page_df = page_df[list(columns)]
+        return page_df, total, n_pages